@@ -0,0 +1,56 @@
+"""
+Import time benchmark for :mod:`hashidtools`, using ``python -X importtime``.
+
+Usage::
+
+    $ python -m benchmarks.bench_import --runs 10 --max-ms 250
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def importtime(module='hashidtools'):
+    """Return {module: (self_us, cumulative_us)} for importing `module`."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.PIPE, check=True, universal_newlines=True)
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(own), int(cumulative))
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='fail if the median import exceeds this')
+    args = parser.parse_args(argv)
+
+    runs = [importtime() for _ in range(args.runs)]
+    total = statistics.median(run['hashidtools'][1] for run in runs) / 1000
+
+    slowest = sorted(
+        runs[-1].items(), key=lambda item: item[1][1], reverse=True)
+    print('{:<48}{:>12}{:>12}'.format('module', 'self ms', 'cumul. ms'))
+    for name, (own, cumulative) in slowest[:args.top]:
+        print('{:<48}{:>12.1f}{:>12.1f}'.format(
+            name, own / 1000, cumulative / 1000))
+    print('\nmedian import hashidtools: {:.1f}ms over {} runs'.format(
+        total, args.runs))
+
+    if args.max_ms is not None and total > args.max_ms:
+        print('FAIL: exceeds {:.1f}ms'.format(args.max_ms))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Compare BTree insert locality of random and time ordered seeds.
+
+Each mode fills an integer keyed `refs` BTree in a FileStorage, like
+`HashIDManager(int_keys=True)`, then commits `--transactions` batches of
+`--batch` new ID's.  Reported per mode:
+
+* objects: BTree/bucket records written per transaction.
+* bytes: storage growth per transaction.
+* splits: buckets created by the batches.
+* conflicts: share of rounds where the second of two concurrent writers
+  failed with a ConflictError, `time-sharded` gives each writer a shard.
+
+Usage::
+
+    $ python -m benchmarks.bench_locality --existing 100000 --batch 100
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import transaction
+from BTrees import family64
+from ZODB import DB
+from ZODB.FileStorage import FileStorage
+from ZODB.POSException import ConflictError
+
+from hashidtools.seeds import RandomSeeds, TimeOrderedSeeds
+
+# Seed source factories, called with the writer's index.
+MODES = {
+    'random': lambda writer: RandomSeeds(),
+    'time': lambda writer: TimeOrderedSeeds(),
+    'time-counter': lambda writer: TimeOrderedSeeds(counter=True),
+    'time-sharded': lambda writer: TimeOrderedSeeds(
+        random_bits=18, shard=writer, shard_bits=4),
+}
+
+
+def count_buckets(tree):
+    bucket = tree._firstbucket
+    count = 0
+    while bucket is not None:
+        count += 1
+        bucket = bucket._next
+    return count
+
+
+def insert(refs, seeds, count):
+    for seed in seeds.many(count):
+        refs[int(seed)] = b''
+
+
+def run_mode(make_seeds, args, path):
+    storage = FileStorage(path)
+    db = DB(storage)
+    try:
+        seeds = make_seeds(0)
+        with db.transaction() as conn:
+            refs = conn.root.refs = family64.IO.BTree()
+            for _ in range(0, args.existing, args.batch):
+                insert(refs, seeds, args.batch)
+
+        conn = db.open()
+        refs = conn.root.refs
+        buckets = count_buckets(refs)
+        size = storage.getSize()
+        last = storage.lastTransaction()
+        for _ in range(args.transactions):
+            insert(refs, seeds, args.batch)
+            transaction.commit()
+        splits = count_buckets(refs) - buckets
+        growth = storage.getSize() - size
+        objects = sum(len(list(txn)) for txn in storage.iterator(last)
+                      if txn.tid != last)
+        conn.close()
+
+        # Two writers with their own seed sources, committing in turn.
+        conflicts = 0
+        writers = []
+        for writer in range(2):
+            manager = transaction.TransactionManager()
+            writers.append((manager, db.open(manager), make_seeds(writer)))
+        for _ in range(args.transactions):
+            for manager, conn, seeds in writers:
+                manager.begin()
+                insert(conn.root.refs, seeds, args.batch)
+            for manager, _, _ in writers:
+                try:
+                    manager.commit()
+                except ConflictError:
+                    manager.abort()
+                    conflicts += 1
+        for _, conn, _ in writers:
+            conn.close()
+    finally:
+        db.close()
+
+    return {
+        'objects': objects / args.transactions,
+        'bytes': growth / args.transactions,
+        'splits': splits,
+        'conflicts': conflicts / args.transactions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--existing', type=int, default=100000,
+                        help='ID\'s in the tree before measuring')
+    parser.add_argument('--batch', type=int, default=100,
+                        help='ID\'s inserted per transaction')
+    parser.add_argument('--transactions', type=int, default=100)
+    parser.add_argument('--only', default=None,
+                        help='comma separated modes: ' + ','.join(MODES))
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(MODES)
+    print('{:<16}{:>12}{:>14}{:>10}{:>12}'.format(
+        'mode', 'objects/txn', 'bytes/txn', 'splits', 'conflicts'))
+    directory = tempfile.mkdtemp()
+    try:
+        for name in names:
+            path = os.path.join(directory, name + '.fs')
+            result = run_mode(MODES[name], args, path)
+            print('{:<16}{:>12.1f}{:>14.0f}{:>10}{:>11.0%}'.format(
+                name, result['objects'], result['bytes'], result['splits'],
+                result['conflicts']))
+    finally:
+        shutil.rmtree(directory)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Memory benchmark comparing :class:`HashID` and :class:`CompactHashID`.
+
+Usage::
+
+    $ python -m benchmarks.bench_memory 1000000
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from hashidtools import HashIDGenerator, HashID, CompactHashID
+
+
+def measure(factory, seeds):
+    """Return the bytes held by `factory(seed)` for all seeds."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [factory(seed) for seed in seeds]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return after - before
+
+
+def main(count=100000):
+    gen = HashIDGenerator()
+    seeds = [gen.seed() for _ in range(count)]
+    hashids = gen.encode_many(seeds)
+
+    # Every factory builds its values from scratch so they're all counted.
+    results = {
+        'str': measure(gen.encode, seeds),
+        'HashID': measure(lambda seed: HashID(gen.encode(seed)), seeds),
+        'CompactHashID': measure(
+            lambda hashid: CompactHashID.from_hashid(hashid, gen), hashids),
+    }
+    print('{:<16}{:>16}{:>12}'.format('type', 'total bytes', 'per id'))
+    for name, size in results.items():
+        print('{:<16}{:>16}{:>12.1f}'.format(name, size, size / count))
+    return results
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
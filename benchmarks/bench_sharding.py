@@ -0,0 +1,128 @@
+"""
+Compare concurrent registration throughput of sharded and unsharded managers.
+
+`--threads` writers, each with its own ZODB connection, register
+`--transactions` batches of `--batch` objects into one manager stored in
+the root, retrying on ConflictError.  Reported per manager: committed
+registrations per second and retries per committed transaction.
+
+Usage::
+
+    $ python -m benchmarks.bench_sharding --threads 8 --shards 16 \\
+        --storage file
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import attr
+import transaction
+from ZODB import DB
+from ZODB.FileStorage import FileStorage
+from ZODB.MappingStorage import MappingStorage
+from ZODB.POSException import ConflictError
+
+from hashidtools import HashIDManager, ShardedHashIDManager
+from hashidtools import fields
+
+
+@attr.s
+class Fixture:
+    id: str = fields.hashid()
+
+
+def writer(db, args, stats, lock, barrier):
+    manager = transaction.TransactionManager()
+    conn = db.open(manager)
+    retries = 0
+    barrier.wait()
+    for _ in range(args.transactions):
+        objs = [Fixture() for _ in range(args.batch)]
+        while True:
+            manager.begin()
+            try:
+                conn.root.intid.register_many(objs)
+                manager.commit()
+                break
+            except ConflictError:
+                manager.abort()
+                retries += 1
+    conn.close()
+    with lock:
+        stats['retries'] += retries
+
+
+def run(make_manager, args, directory):
+    if args.storage == 'file':
+        storage = FileStorage(os.path.join(directory, 'Data.fs'))
+    else:
+        storage = MappingStorage()
+    db = DB(storage, pool_size=args.threads + 1)
+    try:
+        with db.transaction() as conn:
+            intid = conn.root.intid = make_manager()
+            for _ in range(0, args.existing, args.batch):
+                intid.register_many([Fixture() for _ in range(args.batch)])
+
+        stats = {'retries': 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(args.threads + 1)
+        threads = [
+            threading.Thread(
+                target=writer, args=(db, args, stats, lock, barrier))
+            for _ in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+
+    txns = args.threads * args.transactions
+    return txns * args.batch / elapsed, stats['retries'] / txns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--transactions', type=int, default=50,
+                        help='transactions per thread')
+    parser.add_argument('--batch', type=int, default=10,
+                        help='registrations per transaction')
+    parser.add_argument('--existing', type=int, default=10000,
+                        help='registrations before measuring')
+    parser.add_argument('--shards', type=int, default=16)
+    parser.add_argument('--storage', choices=('mapping', 'file'),
+                        default='mapping')
+    parser.add_argument('--int-keys', action='store_true')
+    args = parser.parse_args(argv)
+
+    managers = {
+        'HashIDManager': lambda: HashIDManager(int_keys=args.int_keys),
+        'ShardedHashIDManager': lambda: ShardedHashIDManager(
+            int_keys=args.int_keys, shards=args.shards),
+    }
+    print('{:<24}{:>14}{:>14}'.format('manager', 'ids/s', 'retries/txn'))
+    directory = tempfile.mkdtemp()
+    try:
+        for name, make_manager in managers.items():
+            throughput, retries = run(make_manager, args, directory)
+            print('{:<24}{:>14.0f}{:>14.2f}'.format(
+                name, throughput, retries))
+            for filename in os.listdir(directory):
+                os.remove(os.path.join(directory, filename))
+    finally:
+        shutil.rmtree(directory)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
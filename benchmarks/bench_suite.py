@@ -0,0 +1,305 @@
+"""
+Benchmark suite for the generator, HashID types, fields and HashIDManager.
+
+Results are nanoseconds per operation, best of `--repeat` runs, for each
+benchmark and size.  Compare against a baseline to fail on regressions.
+
+Usage::
+
+    $ python -m benchmarks.bench_suite --sizes 10000,100000 \\
+        --output bench.json --baseline baseline.json --threshold 0.2
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+
+import attr
+
+import hashidtools
+from hashidtools import HashIDGenerator, HashID, CompactHashID, HashIDManager
+from hashidtools import fields
+from hashidtools.codec import codecs
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """Register a benchmark, `func(size)` returns a callable to time."""
+    BENCHMARKS[func.__name__[len('bench_'):]] = func
+    return func
+
+
+@attr.s
+class Fixture:
+    id: str = fields.hashid()
+
+
+def make_objects(size):
+    gen = HashIDGenerator()
+    return [Fixture(hashid) for hashid in gen.new_many(size)]
+
+
+@benchmark
+def bench_generator_new(size):
+    new = HashIDGenerator().new
+    return lambda: [new() for _ in range(size)]
+
+
+@benchmark
+def bench_generator_construct(size):
+    # Rotating through more salts than the codec cache holds misses on
+    # every construction.
+    salts = ['tenant-{}'.format(i) for i in range(2 * codecs.maxsize)]
+    return lambda: [HashIDGenerator(salt=salts[i % len(salts)])
+                    for i in range(size)]
+
+
+@benchmark
+def bench_generator_construct_cached(size):
+    salts = ['tenant-{}'.format(i) for i in range(min(size, 100))]
+    for salt in salts:
+        HashIDGenerator(salt=salt)
+    return lambda: [HashIDGenerator(salt=salts[i % len(salts)])
+                    for i in range(size)]
+
+
+@benchmark
+def bench_generator_new_many(size):
+    gen = HashIDGenerator()
+    gen.new_many(1)
+    return lambda: gen.new_many(size)
+
+
+@benchmark
+def bench_generator_encode(size):
+    gen = HashIDGenerator()
+    seeds = [gen.seed() for _ in range(size)]
+    encode = gen.encode
+    return lambda: [encode(seed) for seed in seeds]
+
+
+@benchmark
+def bench_generator_decode(size):
+    gen = HashIDGenerator()
+    hashids = gen.new_many(size)
+    decode = gen.decode
+    return lambda: [decode(hashid) for hashid in hashids]
+
+
+@benchmark
+def bench_generator_encode_into(size):
+    gen = HashIDGenerator()
+    seeds = [gen.seed() for _ in range(size)]
+    buf = bytearray(gen.min_length)
+    encode_into = gen.encode_into
+    return lambda: [encode_into(buf, 0, seed) for seed in seeds]
+
+
+@benchmark
+def bench_generator_decode_packed(size):
+    gen = HashIDGenerator()
+    packed = gen.encode_packed(gen.seeds.many(size))
+    return lambda: gen.decode_packed(packed)
+
+
+@benchmark
+def bench_hashid_construct(size):
+    hashids = HashIDGenerator().new_many(size)
+    return lambda: [HashID(hashid) for hashid in hashids]
+
+
+@benchmark
+def bench_hashid_hash(size):
+    ids = [HashID(hashid) for hashid in HashIDGenerator().new_many(size)]
+    return lambda: [hash(hid) for hid in ids]
+
+
+@benchmark
+def bench_hashid_compare(size):
+    ids = [HashID(hashid) for hashid in HashIDGenerator().new_many(size)]
+    return lambda: sorted(ids)
+
+
+@benchmark
+def bench_hashid_eq(size):
+    ids = [HashID(hashid) for hashid in HashIDGenerator().new_many(size)]
+    others = [HashID(hid.id) for hid in ids]
+    return lambda: [hid == other for hid, other in zip(ids, others)]
+
+
+@benchmark
+def bench_hashid_int(size):
+    ids = [HashID(hashid) for hashid in HashIDGenerator().new_many(size)]
+    return lambda: [int(hid) for hid in ids]
+
+
+@benchmark
+def bench_compact_hashid_construct(size):
+    gen = HashIDGenerator()
+    seeds = [gen.seed() for _ in range(size)]
+    return lambda: [CompactHashID(seed, gen) for seed in seeds]
+
+
+@benchmark
+def bench_compact_hashid_compare(size):
+    gen = HashIDGenerator()
+    ids = [CompactHashID(gen.seed(), gen) for _ in range(size)]
+    return lambda: sorted(ids)
+
+
+@benchmark
+def bench_compact_hashid_sort_key(size):
+    gen = HashIDGenerator()
+    ids = [CompactHashID(gen.seed(), gen) for _ in range(size)]
+    return lambda: sorted(ids, key=str)
+
+
+@benchmark
+def bench_compact_hashid_eq(size):
+    gen = HashIDGenerator()
+    ids = [CompactHashID(gen.seed(), gen) for _ in range(size)]
+    others = [CompactHashID(hid.value, gen) for hid in ids]
+    return lambda: [hid == other for hid, other in zip(ids, others)]
+
+
+@benchmark
+def bench_field_validate(size):
+    field = fields.HashID()
+    hashids = HashIDGenerator().new_many(size)
+    validate = field.validate
+    return lambda: [validate(hashid) for hashid in hashids]
+
+
+@benchmark
+def bench_manager_register(size):
+    objs = make_objects(size)
+
+    def run():
+        register = HashIDManager().register
+        for obj in objs:
+            register(obj)
+    return run
+
+
+@benchmark
+def bench_manager_register_many(size):
+    objs = make_objects(size)
+    return lambda: HashIDManager().register_many(objs)
+
+
+@benchmark
+def bench_manager_get_id(size):
+    objs = make_objects(size)
+    intid = HashIDManager()
+    intid.register_many(objs)
+    return lambda: [intid.getId(obj) for obj in objs]
+
+
+@benchmark
+def bench_manager_get_object(size):
+    objs = make_objects(size)
+    intid = HashIDManager()
+    uids = intid.register_many(objs)
+    return lambda: [intid.getObject(uid) for uid in uids]
+
+
+@benchmark
+def bench_manager_unregister(size):
+    gen = HashIDGenerator()
+    hashids = gen.new_many(size)
+
+    def run():
+        objs = [Fixture(hashid) for hashid in hashids]
+        intid = HashIDManager()
+        intid.register_many(objs)
+        unregister = intid.unregister
+        start = time.perf_counter()
+        for obj in objs:
+            unregister(obj)
+        return time.perf_counter() - start
+    return run
+
+
+def measure(func, size, repeat):
+    """Return the best nanoseconds per operation of `func(size)`."""
+    best = None
+    for _ in range(repeat):
+        run = func(size)
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            elapsed = run()
+            if not isinstance(elapsed, float):
+                elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / size * 1e9
+
+
+def compare(results, baseline, threshold):
+    """Return [(name, size, baseline, result)] regressed beyond threshold."""
+    regressions = []
+    for name, sizes in results.items():
+        for size, result in sizes.items():
+            base = baseline.get(name, {}).get(size)
+            if base and result > base * (1 + threshold):
+                regressions.append((name, size, base, result))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10000,100000',
+                        help='comma separated sizes, up to 10000000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default=None,
+                        help='comma separated benchmark names')
+    parser.add_argument('--output', default=None,
+                        help='write results to this JSON file')
+    parser.add_argument('--baseline', default=None,
+                        help='compare with results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown vs the baseline, 0.2 is 20%%')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+
+    results = {}
+    print('{:<32}{:>12}{:>14}'.format('benchmark', 'size', 'ns/op'))
+    for name in names:
+        results[name] = {}
+        for size in sizes:
+            result = measure(BENCHMARKS[name], size, args.repeat)
+            results[name][str(size)] = result
+            print('{:<32}{:>12}{:>14.1f}'.format(name, size, result))
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump({
+                'version': hashidtools.__version__,
+                'python': platform.python_version(),
+                'results': results,
+            }, fd, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as fd:
+            baseline = json.load(fd)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name, size, base, result in regressions:
+            print('REGRESSION {} [{}]: {:.1f} -> {:.1f} ns/op'.format(
+                name, size, base, result))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
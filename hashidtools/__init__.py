@@ -62,10 +62,11 @@ Usage::
 __version__ = '1.0.2'
 __title__ = "hashidtools"
 
-from zope.configuration import xmlconfig
+from . import interfaces, exceptions, events, types, fields, registration
+from .types import (
+    HashIDGenerator, PooledHashIDGenerator, HashID, LazyHashID,
+    CompactHashID, HashIDManager, ShardedHashIDManager)
+from .registration import configure
 
-from . import interfaces, exceptions, types, fields
-from .types import HashIDGenerator, HashID, HashIDManager
 
-
-xmlconfig.file('configure.zcml', __import__('sys').modules[__name__])
+configure()
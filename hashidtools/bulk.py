@@ -0,0 +1,147 @@
+"""
+hashidtools.bulk
+~~~~~~~~~~~~~~~~
+
+Parallel bulk encoding/decoding across a process pool, for migrations.
+
+Inputs are split into chunks which are encoded/decoded by worker processes,
+each building its :class:`HashIDGenerator` once from the parent generator's
+`salt`, `min_length` and `alphabet`.  Chunks travel packed into single byte
+strings rather than as pickled lists of strings/ints, and results come back
+in input order.
+
+Usage::
+
+    >>> from hashidtools import bulk
+    >>> hashids = bulk.encode(range(10 ** 6), workers=8)
+    >>> bulk.decode(hashids, workers=8)[:3]
+    [0, 1, 2]
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+import os
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .lookup import get_generator
+from .types import HashIDGenerator
+
+SEPARATOR = '\n'
+
+_generator = None
+
+
+def _initialize(salt, min_length, alphabet):
+    global _generator  # pylint: disable=global-statement
+    _generator = HashIDGenerator(salt, min_length, alphabet)
+
+
+def _encode_chunk(packed):
+    """Encode packed integers, returning the hashids packed into bytes."""
+    values = _unpack_ints(packed)
+    return SEPARATOR.join(_generator.encode_many(values)).encode()
+
+
+def _decode_chunk(packed):
+    """Decode packed hashids, returning their integers packed into bytes."""
+    hashids = packed.decode().split(SEPARATOR)
+    return array('Q', _generator.decode_many(hashids)).tobytes()
+
+
+def _unpack_hashids(packed):
+    return packed.decode().split(SEPARATOR)
+
+
+def _unpack_ints(packed):
+    ints = array('Q')
+    ints.frombytes(packed)
+    return ints.tolist()
+
+
+def _chunks(values, chunksize):
+    """Yield lists, or array slices, of `chunksize` items from `values`."""
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        for start in range(0, len(values), chunksize):
+            yield values[start:start + chunksize]
+        return
+    values = iter(values)
+    while True:
+        chunk = list(islice(values, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _imap(func, chunks, generator, workers):
+    """Yield `func(chunk)` for each chunk, in order, from a process pool.
+
+    At most `2 * workers` chunks are in flight, so file backed or generated
+    inputs are never read into memory all at once.
+    """
+    args = (generator.salt, generator.min_length, generator.alphabet)
+    if workers == 1:
+        _initialize(*args)
+        for chunk in chunks:
+            yield func(chunk)
+        return
+
+    with ProcessPoolExecutor(
+            workers, initializer=_initialize, initargs=args) as executor:
+        pending = deque()
+        for chunk in chunks:
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(executor.submit(func, chunk))
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_encode(values, generator=None, workers=None, chunksize=100000):
+    """Yield hashids for the integers in `values`, in order.
+
+    :param values iterable: Integers, a list, array or any iterable.
+    :param generator HashIDGenerator: (None) Defaults to the utility.
+    :param workers int: (None) Worker processes, defaults to the CPU count.
+    :param chunksize int: (100000) Values per chunk sent to a worker.
+    """
+    generator = generator or get_generator()
+    workers = workers or os.cpu_count() or 1
+    chunks = (array('Q', chunk).tobytes()
+              for chunk in _chunks(values, chunksize))
+    for packed in _imap(_encode_chunk, chunks, generator, workers):
+        yield from _unpack_hashids(packed)
+
+
+def iter_decode(hashids, generator=None, workers=None, chunksize=100000):
+    """Yield the integers for hashids in `hashids`, in order.
+
+    Raises :class:`IndexError` for invalid hashids, like
+    :meth:`HashIDGenerator.decode`.
+
+    :param hashids iterable: Hashid strings, a list or any iterable.
+    :param generator HashIDGenerator: (None) Defaults to the utility.
+    :param workers int: (None) Worker processes, defaults to the CPU count.
+    :param chunksize int: (100000) Hashids per chunk sent to a worker.
+    """
+    generator = generator or get_generator()
+    workers = workers or os.cpu_count() or 1
+    chunks = (SEPARATOR.join(chunk).encode()
+              for chunk in _chunks(hashids, chunksize))
+    for packed in _imap(_decode_chunk, chunks, generator, workers):
+        yield from _unpack_ints(packed)
+
+
+def encode(values, generator=None, workers=None, chunksize=100000):
+    """Return a list of hashids for the integers in `values`."""
+    return list(iter_encode(values, generator, workers, chunksize))
+
+
+def decode(hashids, generator=None, workers=None, chunksize=100000):
+    """Return a list of the integers for hashids in `hashids`."""
+    return list(iter_decode(hashids, generator, workers, chunksize))
@@ -0,0 +1,141 @@
+"""
+hashidtools.cli
+~~~~~~~~~~~~~~~~
+
+Streaming command line interface, reads stdin and writes stdout.
+
+Usage::
+
+    $ seq 1 1000000 | python -m hashidtools encode > hashids.txt
+    $ python -m hashidtools decode --workers 8 < hashids.txt
+    $ python -m hashidtools validate < hashids.txt
+    $ python -m hashidtools --salt 'my salt' generate 1000000
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+import argparse
+import sys
+
+import attr
+
+from .fields import HashIDValidator
+from .types import HashIDGenerator
+
+BUFFER_SIZE = 1 << 20
+
+
+def read_batches(stream, size=BUFFER_SIZE):
+    """Yield lists of non-blank lines, reading about `size` bytes at a time."""
+    while True:
+        lines = stream.readlines(size)
+        if not lines:
+            return
+        yield [line.decode() for line in map(bytes.strip, lines) if line]
+
+
+def write_batch(stream, values):
+    if values:
+        stream.write('\n'.join(values).encode())
+        stream.write(b'\n')
+
+
+def _lines(stdin):
+    for batch in read_batches(stdin):
+        yield from batch
+
+
+def encode(generator, args, stdin, stdout):
+    if args.workers > 1:
+        from . import bulk  # pylint: disable=import-outside-toplevel
+        hashids = bulk.iter_encode(
+            map(int, _lines(stdin)), generator, args.workers)
+        for batch in iter(lambda: [*zip(range(65536), hashids)], []):
+            write_batch(stdout, [hashid for _, hashid in batch])
+        return 0
+
+    for batch in read_batches(stdin):
+        write_batch(stdout, generator.encode_many([int(v) for v in batch]))
+    return 0
+
+
+def decode(generator, args, stdin, stdout):
+    if args.workers > 1:
+        from . import bulk  # pylint: disable=import-outside-toplevel
+        values = bulk.iter_decode(_lines(stdin), generator, args.workers)
+        for batch in iter(lambda: [*zip(range(65536), values)], []):
+            write_batch(stdout, [str(value) for _, value in batch])
+        return 0
+
+    for batch in read_batches(stdin):
+        write_batch(stdout, [str(v) for v in generator.decode_many(batch)])
+    return 0
+
+
+def validate(generator, args, stdin, stdout):
+    validator = HashIDValidator.from_generator(generator, args.decode)
+    status = 0
+    for batch in read_batches(stdin):
+        invalid = [hashid for hashid, valid in
+                   zip(batch, validator.validate_many(batch)) if not valid]
+        if invalid:
+            status = 1
+            write_batch(stdout, invalid)
+    return status
+
+
+def generate(generator, args, stdin, stdout):
+    remaining = args.count
+    while remaining > 0:
+        count = min(remaining, 65536)
+        write_batch(stdout, generator.new_many(count))
+        remaining -= count
+    return 0
+
+
+def make_parser():
+    defaults = {field.name: field.default
+                for field in attr.fields(HashIDGenerator)}
+    parser = argparse.ArgumentParser(
+        prog='hashidtools', description='Stream HashIDs from stdin to stdout.')
+    parser.add_argument('--salt', default=defaults['salt'])
+    parser.add_argument('--min-length', type=int,
+                        default=defaults['min_length'])
+    parser.add_argument('--alphabet', default=defaults['alphabet'])
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    command = commands.add_parser('encode', help='encode integers')
+    command.add_argument('-j', '--workers', type=int, default=1)
+    command.set_defaults(func=encode)
+
+    command = commands.add_parser('decode', help='decode hashids')
+    command.add_argument('-j', '--workers', type=int, default=1)
+    command.set_defaults(func=decode)
+
+    command = commands.add_parser(
+        'validate', help='write invalid hashids, exit 1 if there are any')
+    command.add_argument('--decode', action='store_true',
+                         help='also check that hashids decode')
+    command.set_defaults(func=validate)
+
+    command = commands.add_parser('generate', help='generate new hashids')
+    command.add_argument('count', type=int)
+    command.set_defaults(func=generate)
+    return parser
+
+
+def main(argv=None, stdin=None, stdout=None):
+    """Run the command line interface, returns the exit status."""
+    args = make_parser().parse_args(argv)
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    generator = HashIDGenerator(args.salt, args.min_length, args.alphabet)
+    try:
+        return args.func(generator, args, stdin, stdout)
+    except (ValueError, IndexError) as exc:
+        sys.stderr.write('hashidtools: invalid input: {}\n'.format(exc))
+        return 2
+    finally:
+        stdout.flush()
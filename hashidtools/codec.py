@@ -0,0 +1,577 @@
+"""
+hashidtools.codec
+~~~~~~~~~~~~~~~~
+
+Specialized hashids codec for single integer values.
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+import re
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+import hashids
+
+# Codecs kept by the process-wide `codecs` cache, enough for a generator per
+# tenant salt.  A codec grows to about 90KB with the default alphabet once
+# every lottery alphabet is built, codecs of rarely used salts stay small.
+CODEC_CACHE_SIZE = 4096
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+
+@lru_cache(maxsize=None)
+def get_numpy():
+    """Return numpy if it's installed, imported on first use only."""
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return numpy
+
+
+def _reorder(string, salt):
+    # pylint: disable=protected-access
+    return hashids._reorder(string, salt)
+
+
+def _check_fits(view, offset, size):
+    if offset < 0 or offset + size > len(view):
+        raise ValueError(
+            '{} byte hash does not fit at offset {} of a {} byte buffer'
+            .format(size, offset, len(view)))
+
+
+class HashIDCodec:
+    """Hashids codec specialized for a single non-negative integer.
+
+    Produces output identical to :class:`hashids.Hashids` but computes the
+    per-lottery alphabets and padding alphabets once, on first use, so that
+    encoding/decoding one seed doesn't reshuffle anything.  Anything
+    outside of that case (multiple values, non-int values, ids containing
+    separators) is delegated to the wrapped :class:`hashids.Hashids`.
+
+    :param salt str: A short string to use as the unique salt.
+    :param min_length int: The minimum length of the encoded value.
+    :param alphabet str: The alphabet to use for encoding.
+    :return: a HashIDCodec object.
+    :rtype: :inst:`HashIDCodec`
+
+    Usage::
+
+        >>> codec = HashIDCodec('sdfs', 32)
+        >>> codec.encode(1762352222709391612)
+        'bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3'
+        >>> codec.decode('bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3')
+        (1762352222709391612,)
+    """
+
+    __slots__ = ('hashids', 'min_length', '_guards', '_guard_table',
+                 '_alphabet', '_lotteries', '_split_at', '_ascii',
+                 '_layouts', '_byte_tables', '_core_search', '_lock')
+
+    def __init__(self, salt='', min_length=0,
+                 alphabet=hashids.Hashids.ALPHABET):
+        # pylint: disable=protected-access
+        self.hashids = gen = hashids.Hashids(salt, min_length, alphabet)
+        self.min_length = gen._min_length
+        self._guards = gen._guards
+        self._guard_table = str.maketrans(
+            {char: gen._guards[0] for char in gen._guards})
+        self._split_at = len(gen._alphabet) // 2
+        self._ascii = all(
+            ord(char) < 128 for char in gen._alphabet + gen._guards)
+
+        # The only per-value state in hashids' single value path is the
+        # lottery character, so every alphabet it can shuffle to is known,
+        # each is built by `_entry` the first time it's needed.
+        self._alphabet = gen._alphabet
+        self._lotteries = [None] * len(gen._alphabet)
+        self._layouts = {}
+        self._byte_tables = None
+        self._core_search = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '{}(min_length={!r})'.format(
+            self.__class__.__name__, self.min_length)
+
+    def _entry(self, index):
+        """Return `(lottery, alphabet, char to digit, padding chain)`."""
+        entry = self._lotteries[index]
+        if entry is None:
+            # pylint: disable=protected-access
+            gen = self.hashids
+            lottery = gen._alphabet[index]
+            alpha = _reorder(
+                gen._alphabet, (lottery + gen._salt + gen._alphabet)[
+                    :len(gen._alphabet)])
+            entry = (lottery, alpha, {c: i for i, c in enumerate(alpha)}, [])
+            # Racing threads build equal entries, either one can be kept.
+            self._lotteries[index] = entry
+        return entry
+
+    def _padding(self, entry, index):
+        """Return the `index`th padding alphabet halves for `entry`."""
+        chain = entry[3]
+        if len(chain) <= index:
+            # Codecs are shared between threads, each link is built from
+            # the previous one.
+            with self._lock:
+                while len(chain) <= index:
+                    alpha = chain[-1][2] if chain else entry[1]
+                    alpha = _reorder(alpha, alpha)
+                    chain.append(
+                        (alpha[self._split_at:], alpha[:self._split_at],
+                         alpha))
+        return chain[index]
+
+    def _encode_one(self, value):
+        values_hash = value % 100
+        lottery, alpha, _, _ = entry = self._entry(
+            values_hash % len(self._lotteries))
+
+        len_alpha = len(alpha)
+        chars = []
+        while True:
+            value, rem = divmod(value, len_alpha)
+            chars.append(alpha[rem])
+            if not value:
+                break
+        chars.append(lottery)
+        encoded = ''.join(reversed(chars))
+
+        min_length = self.min_length
+        if len(encoded) >= min_length:
+            return encoded
+
+        guards = self._guards
+        encoded = guards[(values_hash + ord(lottery)) % len(guards)] + encoded
+        if len(encoded) < min_length:
+            encoded += guards[(values_hash + ord(encoded[2])) % len(guards)]
+
+        index = 0
+        while len(encoded) < min_length:
+            head, tail, _ = self._padding(entry, index)
+            encoded = head + encoded + tail
+            excess = len(encoded) - min_length
+            if excess > 0:
+                start = excess // 2
+                encoded = encoded[start:start + min_length]
+            index += 1
+        return encoded
+
+    def _decode_one(self, hashid):
+        parts = hashid.translate(self._guard_table).split(self._guards[0])
+        core = parts[1] if 2 <= len(parts) <= 3 else parts[0]
+        if not core:
+            return ()
+
+        lottery = self._alphabet.find(core[0])
+        if lottery < 0:
+            return None
+        index = self._entry(lottery)[2]
+        len_alpha = len(index)
+        number = 0
+        try:
+            for char in core[1:]:
+                number = number * len_alpha + index[char]
+        except KeyError:
+            return None
+        return (number,) if self._encode_one(number) == hashid else ()
+
+    def encode(self, *values):
+        """Builds a hash from the passed `values`."""
+        if len(values) == 1 and type(values[0]) is int and values[0] >= 0:
+            return self._encode_one(values[0])
+        return self.hashids.encode(*values)
+
+    def decode(self, hashid):
+        """Restore a tuple of numbers from the passed `hashid`."""
+        if hashid and type(hashid) is str:
+            numbers = self._decode_one(hashid)
+            if numbers is not None:
+                return numbers
+        return self.hashids.decode(hashid)
+
+    def _template(self, length):
+        """Return the output layout for a value of `length` base-L digits.
+
+        Each slot is one of ``('core', i)``, ``('guard', i)`` or
+        ``('pad', iteration, i)``, as laid out by hashids' `_ensure_length`.
+        """
+        slots = [('core', i) for i in range(length + 1)]
+        min_length = self.min_length
+        if len(slots) >= min_length:
+            return slots
+
+        slots.insert(0, ('guard', 0))
+        if len(slots) < min_length:
+            slots.append(('guard', 1))
+
+        len_alpha = len(self._lotteries)
+        iteration = 0
+        while len(slots) < min_length:
+            slots = ([('pad', iteration, i)
+                      for i in range(self._split_at, len_alpha)] +
+                     slots +
+                     [('pad', iteration, i) for i in range(self._split_at)])
+            excess = len(slots) - min_length
+            if excess > 0:
+                start = excess // 2
+                slots = slots[start:start + min_length]
+            iteration += 1
+        return slots
+
+    def _encode_array(self, values):
+        """Vectorized `encode_many` for a uint64 array of `values`."""
+        # pylint: disable=too-many-locals
+        numpy = sys.modules['numpy']
+        len_alpha = len(self._lotteries)
+        entries = [self._entry(index) for index in range(len_alpha)]
+        guards = numpy.frombuffer(self._guards.encode(), dtype=numpy.uint8)
+        alphabets = numpy.array(
+            [[ord(char) for char in entry[1]] for entry in entries],
+            dtype=numpy.uint8)
+        lottery_chars = numpy.array(
+            [ord(entry[0]) for entry in entries], dtype=numpy.uint8)
+
+        values_hash = values % numpy.uint64(100)
+        lotteries = (values_hash % numpy.uint64(len_alpha)).astype(numpy.intp)
+        values_hash = values_hash.astype(numpy.intp)
+
+        digits = []
+        lengths = numpy.ones(len(values), dtype=numpy.intp)
+        remaining = values
+        while True:
+            remaining, digit = numpy.divmod(remaining, numpy.uint64(len_alpha))
+            digits.append(alphabets[lotteries, digit.astype(numpy.intp)])
+            nonzero = remaining > 0
+            if not nonzero.any():
+                break
+            lengths += nonzero
+
+        encoded = [None] * len(values)
+        paddings = {}
+        for length in numpy.unique(lengths).tolist():
+            rows = numpy.flatnonzero(lengths == length)
+            lots = lotteries[rows]
+            hashes = values_hash[rows]
+            core = [lottery_chars[lots]] + [
+                digits[length - i][rows] for i in range(1, length + 1)]
+
+            slots = self._template(length)
+            out = numpy.empty((len(rows), len(slots)), dtype=numpy.uint8)
+            for column, slot in enumerate(slots):
+                if slot[0] == 'core':
+                    out[:, column] = core[slot[1]]
+                elif slot[0] == 'guard':
+                    out[:, column] = guards[
+                        (hashes + core[slot[1]]) % len(guards)]
+                else:
+                    if slot[1] not in paddings:
+                        paddings[slot[1]] = numpy.array(
+                            [[ord(char) for char in
+                              self._padding(entry, slot[1])[2]]
+                             for entry in entries], dtype=numpy.uint8)
+                    out[:, column] = paddings[slot[1]][lots, slot[2]]
+
+            strings = out.view('S{}'.format(len(slots))).ravel()
+            for row, string in zip(rows.tolist(), strings.tolist()):
+                encoded[row] = string.decode('ascii')
+        return encoded
+
+    def _layout(self, length, lottery):
+        """Return the byte layout for `length` digits and lottery index.
+
+        A tuple of the output with padding filled in, the offsets of the
+        core bytes, `(offset, core index)` of guards, and `(start, end)`
+        ranges of padding.
+        """
+        key = (length, lottery)
+        layout = self._layouts.get(key)
+        if layout is not None:
+            return layout
+
+        entry = self._entry(lottery)
+        pattern = bytearray(len(self._template(length)))
+        core, guards, padding = [], [], []
+        for offset, slot in enumerate(self._template(length)):
+            if slot[0] == 'core':
+                core.append(offset)
+            elif slot[0] == 'guard':
+                guards.append((offset, slot[1]))
+            else:
+                alpha = self._padding(entry, slot[1])[2]
+                pattern[offset] = ord(alpha[slot[2]])
+                if padding and padding[-1][1] == offset:
+                    padding[-1][1] = offset + 1
+                else:
+                    padding.append([offset, offset + 1])
+        layout = self._layouts[key] = (
+            bytes(pattern), core, guards,
+            [tuple(span) for span in padding])
+        return layout
+
+    def _tables(self):
+        """Return the per-lottery byte alphabets and byte to digit tables."""
+        tables = self._byte_tables
+        if tables is None:
+            tables = []
+            entries = [self._entry(index)
+                       for index in range(len(self._lotteries))]
+            for entry in entries:
+                digits = [-1] * 256
+                for char, index in entry[2].items():
+                    digits[ord(char)] = index
+                tables.append((entry[1].encode(), digits))
+            lotteries = {ord(entry[0]): i
+                         for i, entry in enumerate(entries)}
+            guards = re.escape(self._guards.encode())
+            self._core_search = re.compile(
+                b'[' + guards + b']([^' + guards + b']+)').search
+            tables = self._byte_tables = (tables, lotteries,
+                                          self._guards.encode())
+        return tables
+
+    def encode_into(self, buf, offset, value):
+        """Write the hash of `value` as ASCII into `buf` at `offset`.
+
+        `buf` is any writable buffer, such as a bytearray, memoryview or
+        mmap.  Returns the number of bytes written, raises ValueError
+        without writing anything if the hash doesn't fit.
+        """
+        view = memoryview(buf).cast('B')
+        if not (self._ascii and type(value) is int and value >= 0):
+            data = self.encode(value).encode()
+            _check_fits(view, offset, len(data))
+            view[offset:offset + len(data)] = data
+            return len(data)
+
+        tables, _, guards = self._tables()
+        values_hash = value % 100
+        lottery = values_hash % len(tables)
+        alpha = tables[lottery][0]
+        len_alpha = len(alpha)
+        digits = []
+        while True:
+            value, rem = divmod(value, len_alpha)
+            digits.append(alpha[rem])
+            if not value:
+                break
+        digits.append(ord(self._alphabet[lottery]))
+        digits.reverse()
+
+        pattern, positions, guard_slots, _ = self._layout(
+            len(digits) - 1, lottery)
+        _check_fits(view, offset, len(pattern))
+        view[offset:offset + len(pattern)] = pattern
+        # The core is contiguous.
+        start = offset + positions[0]
+        view[start:start + len(digits)] = bytes(digits)
+        for position, index in guard_slots:
+            view[offset + position] = guards[
+                (values_hash + digits[index]) % len(guards)]
+        return len(pattern)
+
+    def decode_from(self, buf, offset=0, length=None):
+        """Restore a tuple of numbers from the hash at `offset` in `buf`.
+
+        `buf` is any buffer, the hash is `length` bytes, by default
+        `min_length`, and must be a single value hash.  Returns `()` when
+        it's invalid, like :meth:`decode`.
+        """
+        length = length or self.min_length
+        view = buf if type(buf) is bytes else memoryview(buf).cast('B')
+        end = offset + length
+        if not self._ascii:
+            return self.decode(bytes(view[offset:end]).decode())
+        if not length or end > len(view):
+            return ()
+
+        tables, lotteries, guards = self._tables()
+        match = self._core_search(view, offset, end)
+        if match is None:
+            start, stop = offset, end
+        else:
+            start, stop = match.span(1)
+        lottery = lotteries.get(view[start])
+        if lottery is None or stop - start < 2:
+            return ()
+        digits = tables[lottery][1]
+        len_alpha = len(tables[lottery][0])
+        number = 0
+        for byte in view[start + 1:stop]:
+            digit = digits[byte]
+            if digit < 0:
+                return ()
+            number = number * len_alpha + digit
+
+        # Only the canonical hash of `number` is valid, as in `decode`.
+        values_hash = number % 100
+        zero = tables[lottery][0][0]
+        if (values_hash % len(tables) != lottery or
+                (stop - start > 2 and view[start + 1] == zero)):
+            return ()
+        pattern, positions, guard_slots, padding = self._layout(
+            stop - start - 1, lottery)
+        if len(pattern) != length or positions[0] != start - offset:
+            return ()
+        for position, index in guard_slots:
+            core_byte = view[start + index]
+            if view[offset + position] != guards[
+                    (values_hash + core_byte) % len(guards)]:
+                return ()
+        for pad_start, pad_end in padding:
+            if view[offset + pad_start:offset + pad_end] != \
+                    pattern[pad_start:pad_end]:
+                return ()
+        return (number,)
+
+    def encode_packed(self, values, width=None):
+        """Return a bytearray of the hashes of `values`, `width` bytes each.
+
+        `width` defaults to `min_length`, raises ValueError for hashes of
+        any other length.
+        """
+        width = width or self.min_length
+        values = values.tolist() if hasattr(values, 'tolist') else list(values)
+        buf = bytearray(width * len(values))
+        encode_into = self.encode_into
+        view = memoryview(buf)
+        for index, value in enumerate(values):
+            offset = index * width
+            if encode_into(view, offset, value) != width:
+                raise ValueError('{!r} does not encode to {} bytes'.format(
+                    value, width))
+        return buf
+
+    def decode_packed(self, buf, width=None):
+        """Return a list of number tuples for packed `width` byte hashes.
+
+        `width` defaults to `min_length`.
+        """
+        width = width or self.min_length
+        view = memoryview(buf).cast('B')
+        if len(view) % width:
+            raise ValueError('buffer is not a multiple of {}'.format(width))
+        decode_from = self.decode_from
+        return [decode_from(view, offset, width)
+                for offset in range(0, len(view), width)]
+
+    def encode_many(self, values):
+        """Return a list of hashes, one for each value in `values`.
+
+        When numpy is installed, arrays of non-negative integers are encoded
+        with vectorized array operations.
+        """
+        # An array means numpy is imported already.
+        numpy = sys.modules.get('numpy')
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            if (self._ascii and values.ndim == 1 and
+                    values.dtype.kind in 'ui' and
+                    (values.dtype.kind == 'u' or not (values < 0).any())):
+                return self._encode_array(values.astype(numpy.uint64))
+            values = values.tolist()
+        encode_one = self._encode_one
+        encode = self.hashids.encode
+        return [encode_one(value)
+                if type(value) is int and value >= 0 else encode(value)
+                for value in values]
+
+    def decode_many(self, hashids):
+        """Return a list of number tuples, one for each hash in `hashids`."""
+        decode = self.decode
+        return [decode(hashid) for hashid in hashids]
+
+
+class CodecCache:
+    """Thread safe LRU cache of :class:`HashIDCodec`'s by their arguments.
+
+    Building a codec reshuffles the alphabet and separators, and lottery
+    alphabets are reshuffled as they're used, generators with the same
+    `(salt, min_length, alphabet)` share one codec instead.  Codecs are
+    built outside the lock, concurrent misses for a key may build it twice
+    but only one is kept.
+
+    :param maxsize int: (CODEC_CACHE_SIZE) The number of codecs kept, None
+        for no limit, 0 disables caching.
+    :return: A CodecCache object.
+    :rtype: :inst:`CodecCache`
+
+    Usage::
+
+        >>> cache = CodecCache(maxsize=2)
+        >>> cache.get('sdfs', 32) is cache.get('sdfs', 32)
+        True
+        >>> cache.cache_info()
+        CacheInfo(hits=1, misses=1, maxsize=2, currsize=1)
+    """
+
+    def __init__(self, maxsize=CODEC_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._codecs = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '{}(maxsize={!r})'.format(self.__class__.__name__, self.maxsize)
+
+    def __len__(self):
+        return len(self._codecs)
+
+    def _evict(self):
+        if self.maxsize is not None:
+            while len(self._codecs) > self.maxsize:
+                self._codecs.popitem(last=False)
+
+    def get(self, salt='', min_length=0, alphabet=hashids.Hashids.ALPHABET):
+        """Return the cached codec for the arguments, building it if needed."""
+        key = (salt, min_length, alphabet)
+        with self._lock:
+            codec = self._codecs.get(key)
+            if codec is not None:
+                self._codecs.move_to_end(key)
+                self.hits += 1
+                return codec
+            self.misses += 1
+
+        codec = HashIDCodec(salt, min_length, alphabet)
+        with self._lock:
+            if self.maxsize != 0:
+                codec = self._codecs.setdefault(key, codec)
+                self._evict()
+        return codec
+
+    def resize(self, maxsize):
+        """Change `maxsize`, evicting the least recently used codecs."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def cache_info(self):
+        """Return the hits, misses, maxsize and current size."""
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._codecs))
+
+    def clear(self):
+        """Discard the cached codecs and statistics."""
+        with self._lock:
+            self._codecs.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Process-wide cache used by HashIDGenerator.
+codecs = CodecCache()
+
+
+def get_codec(salt='', min_length=0, alphabet=hashids.Hashids.ALPHABET):
+    """Return a shared :class:`HashIDCodec` from the process-wide cache."""
+    return codecs.get(salt, min_length, alphabet)
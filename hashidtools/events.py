@@ -0,0 +1,32 @@
+"""
+hashidtools.events
+~~~~~~~~~~~~~~~~
+
+Batched events fired by :class:`hashidtools.types.HashIDManager`.
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+from zope.interface import implementer
+
+from .interfaces import IIdsAddedEvent, IIdsRemovedEvent
+
+
+class IdsEvent:
+    """Base class for batched IntId events."""
+
+    def __init__(self, objects, idmanager, ids):
+        self.objects = objects
+        self.idmanager = idmanager
+        self.ids = ids
+
+
+@implementer(IIdsAddedEvent)
+class IdsAddedEvent(IdsEvent):
+    """A batch of objects has been registered."""
+
+
+@implementer(IIdsRemovedEvent)
+class IdsRemovedEvent(IdsEvent):
+    """A batch of objects has been unregistered."""
@@ -9,52 +9,211 @@ Fields helpers for zope.schema and attrs.
 """
 
 import re
+import threading
 
 from zope.interface import implementer
 from zope.schema.interfaces import IFromUnicode
 from zope.schema._field import NativeStringLine
-from zope.component import queryUtility
 
 import attr
 from attr.validators import instance_of
-from .interfaces import IHashID, IHashIDGenerator
-from .types import HashID as HashIDType
+from .interfaces import IHashID
+from .lookup import get_generator
 from .exceptions import InvalidHashID
 
 HASHID_REGEX = re.compile(r'^\w{32}$')
 
+# Guards first reads of lazy hashids, so one ID is generated per object.
+_lazy_lock = threading.Lock()
+
+
+def _new_hashid():
+    return get_generator().new()
+
+
+class _Lazy:
+    """Placeholder for a lazy hashid that hasn't been generated yet."""
+
+    def __repr__(self):
+        return '<lazy>'
+
+    def __bool__(self):
+        return False
+
+    def __reduce__(self):
+        return 'LAZY'
+
+
+LAZY = _Lazy()
+
+
+def _lazy_or_str(instance, attribute, value):
+    if value is not LAZY and not isinstance(value, str):
+        raise TypeError(
+            "'{}' must be {!r} (got {!r} that is a {!r}).".format(
+                attribute.name, str, value, value.__class__),
+            attribute, str, value)
+
+
+class LazyHashIDAttribute:
+    """Descriptor generating a hashid on first read.
+
+    The value is kept in the `storage` attribute, `LAZY` or missing until
+    the hashid is generated with the registered generator, then returned as
+    is.  `HashIDManager.register` reads it, so objects get their ID when
+    they're first read or registered, whichever comes first.  Assigned
+    values, including None, are stored without generating, frozen classes
+    only allow generating.
+
+    :param storage str: (None) The attribute holding the value, defaults to
+        the descriptor's name prefixed with an underscore.
+    :return: A LazyHashIDAttribute object.
+    :rtype: :inst:`LazyHashIDAttribute`
+
+    Usage::
+
+        >>> @attr.s
+        ... class Document:
+        ...     _id = fields.lazy_hashid()
+        ...     id = fields.LazyHashIDAttribute()
+        >>> document = Document()
+        >>> document
+        Document(_id=<lazy>)
+        >>> document.id
+        '8nKqkABjlYB5A7430M917zAJao1Me4mN'
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage
+
+    def __set_name__(self, owner, name):
+        if self.storage is None:
+            self.storage = '_' + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance, self.storage, LAZY)
+        if value is not LAZY:
+            return value
+        with _lazy_lock:
+            value = getattr(instance, self.storage, LAZY)
+            if value is LAZY:
+                value = _new_hashid()
+                try:
+                    setattr(instance, self.storage, value)
+                except attr.exceptions.FrozenInstanceError:
+                    object.__setattr__(instance, self.storage, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.storage, value)
+
+
+@attr.s(frozen=True)
+class HashIDValidator:
+    """Single pass validator of hashid strings.
+
+    Checks the length and that every character is in the alphabet in one
+    pass, with a character class compiled from the alphabet.  Optionally
+    also checks that the value decodes with `generator`.
+
+    :param alphabet str: The characters a hashid may contain.
+    :param length int: The length of a hashid.
+    :param generator IHashIDGenerator: (None) Also check values decode.
+    :return: A HashIDValidator object.
+    :rtype: :inst:`HashIDValidator`
+
+    Usage::
+
+        >>> validator = HashIDValidator.from_generator(HashIDGenerator())
+        >>> validator('8nKqkABjlYB5A7430M917zAJao1Me4mN')
+        True
+        >>> validator.validate_many(['8nKqkABjlYB5A7430M917zAJao1Me4mN', '_'])
+        [True, False]
+    """
+
+    alphabet: str = attr.ib(validator=instance_of(str))
+    length: int = attr.ib(converter=int, validator=instance_of(int))
+    generator = attr.ib(default=None, repr=False)
+    _match = attr.ib(init=False, repr=False, cmp=False)
+
+    @_match.default
+    def _compile(self):
+        chars = re.escape(''.join(sorted(set(self.alphabet))))
+        return re.compile('[{}]{{{}}}'.format(chars, self.length)).fullmatch
+
+    @classmethod
+    def from_generator(cls, generator, decode=False):
+        """Return a validator for hashids generated by `generator`."""
+        return cls(generator.alphabet, generator.min_length,
+                   generator if decode else None)
+
+    def __call__(self, value):
+        if not isinstance(value, str) or self._match(value) is None:
+            return False
+        if self.generator is None:
+            return True
+        try:
+            self.generator.decode(value)
+        except IndexError:
+            return False
+        return True
+
+    def validate_many(self, values):
+        """Return a list of booleans, whether each of `values` is valid."""
+        return [self(value) for value in values]
+
 
 @implementer(IHashID, IFromUnicode)
 class HashID(NativeStringLine):
     """HashID field for zope.schema.
 
-    Values of HashID fields must be a alphanum string 32chars in length.
+    Values of HashID fields must be strings of the registered generator's
+    `min_length`, using only characters from its alphabet.  With `decode`
+    set values must also decode with it.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, decode=False, **kwargs):
         kwargs.setdefault('title', 'HashID')
         kwargs.setdefault(
             'description', 'A short string representing the HashID.')
         kwargs.setdefault('required', True)
         kwargs.setdefault('readonly', True)
-        kwargs.setdefault('constraint', HASHID_REGEX.match)
-        kwargs.setdefault(
-            'defaultFactory',
-            lambda: queryUtility(IHashIDGenerator).new())
+        kwargs.setdefault('defaultFactory', _new_hashid)
+        self.decode = decode
         super(HashID, self).__init__(*args, **kwargs)
 
+    @property
+    def validator(self):
+        """The :class:`HashIDValidator` for the registered generator."""
+        generator = get_generator()
+        cached = self.__dict__.get('_validator')
+        if cached is None or cached[0] is not generator:
+            cached = (generator, HashIDValidator.from_generator(
+                generator, self.decode))
+            self.__dict__['_validator'] = cached
+        return cached[1]
+
     def _validate(self, value):
         super(HashID, self)._validate(value)
-        if HASHID_REGEX.match(value):
-            return
-        raise InvalidHashID(value)
+        if not self.validator(value):
+            raise InvalidHashID(value)
+
+    def validate_many(self, values):
+        """Validate all `values`, raising on the first invalid one."""
+        validator = self.validator
+        for value in values:
+            if not validator(value):
+                # For the more specific error, if there is one.
+                self.validate(value)
+                raise InvalidHashID(value)
 
     def fromUnicode(self, value):
         """See IFromUnicode."""
         v = value.strip()
         if isinstance(v, bytes):
             v = v.decode()
-        v = HashIDType(v)
         self.validate(v)
         return v
 
@@ -63,5 +222,16 @@ def hashid(*args, **kwargs):
     """HashID field for attrs."""
     return attr.ib(
         validator=[instance_of(str)],
-        factory=queryUtility(IHashIDGenerator),
+        factory=_new_hashid,
         **kwargs)
+
+
+def lazy_hashid(**kwargs):
+    """Lazy HashID field for attrs, backing a :class:`LazyHashIDAttribute`.
+
+    Defaults to `LAZY` instead of generating in `__init__`, name the field
+    `_id` to keep `id` as the init argument.  It's left out of comparisons
+    by default, since unread hashids would compare equal.
+    """
+    kwargs.setdefault('cmp', False)
+    return attr.ib(default=LAZY, validator=_lazy_or_str, **kwargs)
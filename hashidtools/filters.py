@@ -0,0 +1,90 @@
+"""
+hashidtools.filters
+~~~~~~~~~~~~~~~~
+
+Probabilistic membership filters.
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+import math
+
+MASK64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    """In-memory Bloom filter for probabilistic set membership.
+
+    Membership tests never give false negatives, false positives happen at
+    about `error_rate` while no more than `capacity` keys are added.  Bits
+    can't be cleared, so `discard` only counts removals and `stale` tells
+    when the filter is worth rebuilding.
+
+    :param capacity int: (1024) The number of keys the filter is sized for.
+    :param error_rate float: (0.001) The false positive rate at capacity.
+    :return: A BloomFilter object.
+    :rtype: :inst:`BloomFilter`
+
+    Usage::
+
+        >>> bloom = BloomFilter(capacity=1000)
+        >>> bloom.add('8nKqkABjlYB5A7430M917zAJao1Me4mN')
+        >>> '8nKqkABjlYB5A7430M917zAJao1Me4mN' in bloom
+        True
+    """
+
+    def __init__(self, capacity=1024, error_rate=0.001):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError('invalid capacity or error_rate')
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, int(
+            -capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.removed = 0
+
+    def __repr__(self):
+        return '{}(capacity={!r}, error_rate={!r})'.format(
+            self.__class__.__name__, self.capacity, self.error_rate)
+
+    def __len__(self):
+        return self.count
+
+    def _indexes(self, key):
+        # Kirsch-Mitzenmacher double hashing off the builtin hash.
+        first = hash(key) & MASK64
+        second = ((first * 0x9E3779B97F4A7C15) & MASK64) >> 31 | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        bits = self.bits
+        for index in self._indexes(key):
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+    def add(self, key):
+        """Add `key` to the filter."""
+        bits = self.bits
+        for index in self._indexes(key):
+            bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def update(self, keys):
+        """Add all `keys` to the filter."""
+        for key in keys:
+            self.add(key)
+
+    def discard(self, key):
+        """Record the removal of `key`, which stays a false positive."""
+        self.removed += 1
+
+    @property
+    def stale(self):
+        """Whether the filter is over capacity or has too many removals."""
+        return (self.count > self.capacity or
+                self.removed > max(self.count // 10, 64))
@@ -0,0 +1,235 @@
+"""
+hashidtools.index
+~~~~~~~~~~~~~~~~
+
+Read-only, memory-mapped ID index files.
+
+An index file is a 16 byte header, the magic `HIDX`, a version and the
+count, followed by the sorted integer keys of a :class:`HashIDManager` as
+little-endian uint64's.  :class:`IDIndex` maps it read-only, so every
+process on a host shares the same page cache pages instead of loading BTree
+buckets into their own ZODB caches, and answers lookups by binary search.
+
+Usage::
+
+    >>> from hashidtools import index
+    >>> index.export_index(intid, '/var/lib/app/ids.idx')
+    >>> ids = index.IDIndex('/var/lib/app/ids.idx')
+    >>> '8nKqkABjlYB5A7430M917zAJao1Me4mN' in ids
+    True
+    >>> index.update_index('/var/lib/app/ids.idx', added=new_hashids)
+    >>> ids.refresh()
+    True
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+import heapq
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import islice
+
+from .codec import get_numpy
+from .lookup import get_generator
+from .types import shard_of
+
+MAGIC = b'HIDX'
+VERSION = 1
+HEADER = struct.Struct('<4sIQ')
+CHUNK_SIZE = 65536
+
+
+def _write(path, values):
+    """Write sorted integer `values` to an index file at `path`.
+
+    The file is written next to `path` and renamed over it, readers that
+    have the old file mapped keep reading it until they `refresh`.
+    """
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    count = 0
+    values = iter(values)
+    try:
+        with open(tmp, 'wb') as fd:
+            fd.write(HEADER.pack(MAGIC, VERSION, 0))
+            while True:
+                chunk = array('Q', islice(values, CHUNK_SIZE))
+                if not chunk:
+                    break
+                if sys.byteorder != 'little':
+                    chunk.byteswap()
+                chunk.tofile(fd)
+                count += len(chunk)
+            fd.seek(0)
+            fd.write(HEADER.pack(MAGIC, VERSION, count))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return count
+
+
+def _to_int(key, generator):
+    """Return the integer for a hashid or integer `key`, None if invalid."""
+    if isinstance(key, int):
+        return key
+    try:
+        return generator.decode(str(key))
+    except IndexError:
+        return None
+
+
+def export_index(intid, path, generator=None):
+    """Write the keys of the manager `intid` to an index file at `path`.
+
+    Hashid keys are decoded with `generator`, integer keyed managers are
+    exported as is.  Returns the number of keys written.
+
+    :param intid HashIDManager: The manager to export.
+    :param path str: The index file to (re)write.
+    :param generator HashIDGenerator: (None) Defaults to the manager's
+        `key_generator`.
+    """
+    if intid.int_keys:
+        return _write(path, intid.refs.keys())
+    generator = generator or intid.key_generator
+    return _write(path, sorted(generator.decode(key)
+                               for key in intid.refs.keys()))
+
+
+def update_index(path, added=(), removed=(), generator=None):
+    """Rewrite the index file at `path` with keys added and removed.
+
+    Existing keys are merged with `added` in a single streaming pass, so
+    only the new and removed keys need to be known.  Returns the number of
+    keys written.
+
+    :param path str: An existing index file.
+    :param added iterable: Hashids or integers to add.
+    :param removed iterable: Hashids or integers to remove.
+    :param generator HashIDGenerator: (None) Defaults to the utility.
+    """
+    generator = generator or get_generator()
+    added = sorted({_to_int(key, generator) for key in added} - {None})
+    removed = {_to_int(key, generator) for key in removed}
+
+    def merged(keys):
+        last = None
+        for key in heapq.merge(keys, added):
+            if key != last and key not in removed:
+                yield key
+            last = key
+
+    with IDIndex(path, generator) as index:
+        return _write(path, merged(iter(index)))
+
+
+class IDIndex:
+    """Read-only, memory-mapped index of registered integer keys.
+
+    Keys are looked up with a binary search over the mapped file without
+    copying it.  Accepts hashids, decoded with `generator`, or integers.
+
+    :param path str: The index file.
+    :param generator HashIDGenerator: (None) Defaults to the utility.
+    :return: An IDIndex object.
+    :rtype: :inst:`IDIndex`
+    """
+
+    def __init__(self, path, generator=None):
+        self.path = path
+        self.generator = generator or get_generator()
+        self._open()
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.path)
+
+    def _open(self):
+        with open(self.path, 'rb') as fd:
+            stat = os.fstat(fd.fileno())
+            mapped = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(mapped)
+        if magic != MAGIC or version != VERSION:
+            mapped.close()
+            raise ValueError('{} is not an ID index'.format(self.path))
+        if sys.byteorder != 'little':
+            mapped.close()
+            raise ValueError('ID index files are little-endian')
+        self._stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._mmap = mapped
+        self._keys = memoryview(mapped)[
+            HEADER.size:HEADER.size + 8 * count].cast('Q')
+
+    def close(self):
+        """Unmap the index file."""
+        self._keys.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def refresh(self):
+        """Remap the file if it was rewritten, returns whether it was."""
+        stat = os.stat(self.path)
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._stat:
+            return False
+        self.close()
+        self._open()
+        return True
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, key):
+        value = _to_int(key, self.generator)
+        if value is None:
+            return False
+        keys = self._keys
+        rank = bisect_left(keys, value)
+        return rank < len(keys) and keys[rank] == value
+
+    def rank(self, key):
+        """Return the number of keys less than `key`."""
+        value = _to_int(key, self.generator)
+        if value is None:
+            raise KeyError(key)
+        return bisect_left(self._keys, value)
+
+    def to_int(self, key):
+        """Return the integer for a registered `key`, raises KeyError."""
+        value = _to_int(key, self.generator)
+        if value is None or value not in self:
+            raise KeyError(key)
+        return value
+
+    def shard(self, key, shards):
+        """Return which of `shards` owns `key` in an integer keyed
+        :class:`ShardedHashIDManager`."""
+        return shard_of(self.to_int(key), shards)
+
+    def contains_many(self, keys):
+        """Return a list of bools, whether each of `keys` is registered."""
+        values = [_to_int(key, self.generator) for key in keys]
+        numpy = get_numpy()
+        if numpy is None or not len(self._keys):
+            return [value is not None and value in self for value in values]
+
+        valid = numpy.array([value is not None for value in values])
+        search = numpy.array([value or 0 for value in values], dtype='<u8')
+        keys = numpy.frombuffer(self._keys, dtype='<u8')
+        ranks = numpy.minimum(
+            numpy.searchsorted(keys, search), len(keys) - 1)
+        found = (keys[ranks] == search) & valid
+        del keys
+        return found.tolist()
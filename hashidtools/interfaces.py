@@ -13,7 +13,7 @@ Zope compatible interfaces and schemata for this package.
 
 import re
 
-from zope.interface import Interface
+from zope.interface import Interface, Attribute
 import zope.schema
 from zope.component import queryUtility
 
@@ -22,6 +22,32 @@ class IHashIDAware(Interface):
     """Marker for interfaces that support HashIDs."""
 
 
+class ISeedSource(Interface):
+    """Source of random integer seeds for HashID generation."""
+
+    def __call__():
+        """Return a randomly generated ~64bit int seed."""
+
+    def many(count):
+        """Return a sequence of `count` randomly generated seeds."""
+
+
+class IHashIDMetrics(Interface):
+    """Sink for metrics recorded by the generator and manager hot paths.
+
+    Only consulted while a utility providing it is registered.
+    """
+
+    def increment(name, value=1):
+        """Add `value` to the counter `name`."""
+
+    def observe(name, seconds):
+        """Record a latency of `seconds` in the histogram `name`."""
+
+    def snapshot():
+        """Return a dict of the recorded `counters` and `histograms`."""
+
+
 class IHashIDGenerator(Interface):
     """Generator of HashID encoded ID's."""
 
@@ -54,6 +80,27 @@ class IHashIDGenerator(Interface):
     def decode(hashid):
         """Decode a hashid value to it's base integer."""
 
+    def new_many(count):
+        """Return a list of `count` new hashid values."""
+
+    def encode_many(values):
+        """HashID encode an iterable or array of integer values."""
+
+    def decode_many(hashids):
+        """Decode an iterable or array of hashid values to their integers."""
+
+    def encode_into(buf, offset, value):
+        """HashID encode an integer into a writable buffer at `offset`."""
+
+    def decode_from(buf, offset=0, length=None):
+        """Decode the hashid at `offset` in a buffer to it's integer."""
+
+    def encode_packed(values, width=None):
+        """Return a bytearray of fixed width hashids of `values`."""
+
+    def decode_packed(buf, width=None):
+        """Decode a buffer of packed fixed width hashids to integers."""
+
 
 class IHashID(IHashIDAware):
     """HashID type of 64bit integer, used for ZODB object ID generation."""
@@ -61,7 +108,31 @@ class IHashID(IHashIDAware):
     id = zope.schema.TextLine(
         title='HashID', description="A HashIDs based ID.",
         readonly=True, required=True, constraint=re.compile(r'^\w{32}$').match,
-        defaultFactory=queryUtility(IHashIDGenerator))
+        defaultFactory=lambda: queryUtility(IHashIDGenerator).new())
 
     def __int__():
         """Return integer representation of the HashID value."""
+
+    def to_int(generator=None):
+        """Return integer representation, decoded with `generator` if set."""
+
+
+class IIdsEvent(Interface):
+    """Generic base interface for batched IntId-related events."""
+
+    objects = Attribute(
+        "The objects related to this event")
+
+    idmanager = Attribute(
+        "The int id utility generating the event.")
+
+    ids = Attribute(
+        "The ids being assigned or unassigned, in order of `objects`.")
+
+
+class IIdsAddedEvent(IIdsEvent):
+    """A batch of objects has been registered in a unique id utility."""
+
+
+class IIdsRemovedEvent(IIdsEvent):
+    """A batch of objects has been unregistered from a unique id utility."""
@@ -0,0 +1,61 @@
+"""
+hashidtools.lookup
+~~~~~~~~~~~~~~~~
+
+Cached utility lookups for hot paths.
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+from zope.component import getSiteManager
+
+from .interfaces import IHashIDGenerator, IHashIDMetrics
+
+
+class CachedUtility:
+    """Cached `queryUtility` for a single interface and name.
+
+    The looked up utility is cached along with the site manager it came from
+    and that registry's generation, which is bumped on every (un)registration
+    in it or its bases, so changing sites or registrations invalidates it.
+
+    :param interface Interface: The interface the utility provides.
+    :param name str: ('') The name of the utility.
+    :return: A CachedUtility object.
+    :rtype: :inst:`CachedUtility`
+
+    Usage::
+
+        >>> get_generator = CachedUtility(IHashIDGenerator)
+        >>> get_generator()
+        HashIDGenerator(salt='$2a$12$AAAAAAAAAAAAAACgpDEPGQ', min_length=32)
+    """
+
+    __slots__ = ('interface', 'name', '_cache')
+
+    def __init__(self, interface, name=''):
+        self.interface = interface
+        self.name = name
+        self._cache = (None, None, None)
+
+    def __repr__(self):
+        return '{}({!r}, name={!r})'.format(
+            self.__class__.__name__, self.interface, self.name)
+
+    def __call__(self, context=None, default=None):
+        # pylint: disable=protected-access
+        sitemanager = getSiteManager(context)
+        manager, generation, utility = self._cache
+        if (manager is sitemanager and
+                generation == sitemanager.utilities._generation):
+            return default if utility is None else utility
+
+        generation = sitemanager.utilities._generation
+        utility = sitemanager.queryUtility(self.interface, self.name)
+        self._cache = (sitemanager, generation, utility)
+        return default if utility is None else utility
+
+
+get_generator = CachedUtility(IHashIDGenerator)
+get_metrics = CachedUtility(IHashIDMetrics)
@@ -0,0 +1,149 @@
+"""
+hashidtools.metrics
+~~~~~~~~~~~~~~~~
+
+Opt-in instrumentation of the generator and manager hot paths.
+
+Metrics are recorded into the :class:`IHashIDMetrics` utility, while none is
+registered instrumented calls only check a module global.  Register
+:class:`MemoryMetrics`, or an implementation exporting to a metrics
+pipeline, to enable them::
+
+    >>> from zope.component import provideUtility
+    >>> from hashidtools.metrics import MemoryMetrics
+    >>> metrics = MemoryMetrics()
+    >>> provideUtility(metrics)
+    >>> HashIDGenerator().new()
+    '...'
+    >>> metrics.snapshot()['histograms']['generator.new']['count']
+    1
+
+Recorded metrics:
+
+* histograms `generator.new`, `generator.encode`, `generator.decode`,
+  `manager.register`, `manager.register_many`, `manager.unregister`,
+  `manager.unregister_many`, `manager.getObject` and `manager.notify`.
+* counters `<histogram>.errors` for calls that raised.
+* counters `manager.added` and `manager.removed`, registrations in and out
+  of `refs`, whose size isn't tracked since `len` walks every bucket.
+* counter `manager.collisions`, generated ID's found in use.
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+import functools
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+from zope.interface import implementer
+from zope.interface.interfaces import IRegistered
+
+from .interfaces import IHashIDMetrics
+from .lookup import get_metrics
+
+# Registered IHashIDMetrics utilities, in any registry.
+_active = 0
+
+LATENCY_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 1e-2, 1e-1, 1.0)
+
+
+def registration_handler(utility, event):
+    """Track (un)registrations of IHashIDMetrics utilities."""
+    global _active  # pylint: disable=global-statement
+    _active += 1 if IRegistered.providedBy(event) else -1
+
+
+def increment(name, value=1):
+    """Add `value` to the counter `name` of the registered utility."""
+    if not _active:
+        return
+    metrics = get_metrics()
+    if metrics is not None:
+        metrics.increment(name, value)
+
+
+def timed(name):
+    """Decorator recording the latency of calls in the histogram `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return func(*args, **kwargs)
+            metrics = get_metrics()
+            if metrics is None:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                metrics.increment(name + '.errors')
+                raise
+            finally:
+                metrics.observe(name, perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@implementer(IHashIDMetrics)
+class MemoryMetrics:
+    """Thread safe, in-memory IHashIDMetrics sink.
+
+    :param buckets tuple: (LATENCY_BUCKETS) Sorted histogram upper bounds in
+        seconds, slower observations go in a final `inf` bucket.
+    :return: A MemoryMetrics object.
+    :rtype: :inst:`MemoryMetrics`
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        return '{}()'.format(self.__class__.__name__)
+
+    def reset(self):
+        """Discard everything recorded."""
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = [
+                    0, 0.0, [0] * len(self.buckets)]
+            histogram[0] += 1
+            histogram[1] += seconds
+            histogram[2][index] += 1
+
+    def snapshot(self):
+        """Return a copy of the counters and histograms.
+
+        Histograms are dicts of their `count`, `sum` of seconds and
+        `buckets`, a list of `[upper bound, count]` pairs.
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'histograms': {
+                    name: {
+                        'count': count,
+                        'sum': total,
+                        'buckets': [list(pair) for pair in
+                                    zip(self.buckets, counts)],
+                    }
+                    for name, (count, total, counts)
+                    in self._histograms.items()
+                },
+            }
@@ -0,0 +1,57 @@
+"""
+hashidtools.registration
+~~~~~~~~~~~~~~~~
+
+Plain Python registration of this package's components.
+
+Equivalent to loading ``configure.zcml``, without parsing any ZCML.
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+from zope.component import provideHandler, provideUtility
+from zope.component import event, registry
+from zope.interface import classImplements
+from zope.interface.interfaces import IRegistrationEvent
+from zope.intid.interfaces import IIntIds as IZopeIntIds
+from zc.intid.interfaces import IIntIds
+from zc.intid.utility import IntIds
+
+from .interfaces import IHashIDGenerator, IHashIDMetrics
+from .metrics import registration_handler
+from .types import HashIDGenerator, HashIDManager
+
+_configured = False
+
+
+def configure(force=False):
+    """Register the default components in the global registry.
+
+    Only registers once per process unless `force` is set.
+
+    Usage::
+
+        >>> from hashidtools.registration import configure
+        >>> configure()
+    """
+    global _configured  # pylint: disable=global-statement
+    if _configured and not force:
+        return
+
+    # zope.component's configure.zcml
+    provideHandler(event.objectEventNotify)
+    provideHandler(registry.dispatchUtilityRegistrationEvent)
+    provideHandler(registry.dispatchAdapterRegistrationEvent)
+    provideHandler(registry.dispatchSubscriptionAdapterRegistrationEvent)
+    provideHandler(registry.dispatchHandlerRegistrationEvent)
+
+    # Enables instrumentation while an IHashIDMetrics utility is registered.
+    provideHandler(registration_handler, (IHashIDMetrics, IRegistrationEvent))
+
+    # zc.intid's zope-intid.zcml
+    classImplements(IntIds, IZopeIntIds)
+
+    provideUtility(HashIDGenerator(), IHashIDGenerator)
+    provideUtility(HashIDManager(), IIntIds)
+    _configured = True
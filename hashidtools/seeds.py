@@ -0,0 +1,235 @@
+"""
+hashidtools.seeds
+~~~~~~~~~~~~~~~~
+
+Seed sources for HashID generation.
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+import os
+import random
+import struct
+import threading
+import time
+import weakref
+
+from zope.interface import implementer
+
+from .codec import get_numpy
+from .interfaces import ISeedSource
+
+# 2018-01-01T00:00:00Z in milliseconds.
+EPOCH = 1514764800000
+
+_sources = weakref.WeakSet()
+
+
+def _reset_sources():
+    for source in list(_sources):
+        source.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_sources)
+
+
+@implementer(ISeedSource)
+class UrandomSeeds:
+    """Source of ~64bit seeds sliced from buffered `os.urandom` blocks.
+
+    Entropy is read from the OS in `block_size` chunks, so most seeds don't
+    need a syscall.  The buffer is discarded in forked children, so workers
+    never share seeds.
+
+    :param block_size int: (4096) Bytes of entropy to read at a time.
+    :return: A UrandomSeeds object.
+    :rtype: :inst:`UrandomSeeds`
+
+    Usage::
+
+        >>> seeds = UrandomSeeds()
+        >>> seeds()
+        ...
+        >>> seeds.many(3)
+        [..., ..., ...]
+    """
+
+    def __init__(self, block_size=4096):
+        self.block_size = block_size
+        self.reset()
+        _sources.add(self)
+
+    def __repr__(self):
+        return '{}(block_size={!r})'.format(
+            self.__class__.__name__, self.block_size)
+
+    def reset(self):
+        """Discard buffered entropy.
+
+        Also replaces the lock, which a forked child may inherit held.
+        """
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._buffer = b''
+        self._offset = 0
+
+    def read(self, size):
+        """Return `size` random bytes."""
+        if size > self.block_size:
+            return os.urandom(size)
+        if self._pid != os.getpid():
+            # Before taking the lock, it may have been inherited held.
+            self.reset()
+        with self._lock:
+            start = self._offset
+            if start + size > len(self._buffer):
+                self._buffer = os.urandom(self.block_size)
+                start = 0
+            self._offset = start + size
+            return self._buffer[start:start + size]
+
+    def __call__(self):
+        return int.from_bytes(self.read(8), 'little') >> 1
+
+    def many(self, count):
+        """Return `count` seeds, as a uint64 array if numpy is installed."""
+        data = self.read(8 * count)
+        numpy = get_numpy()
+        if numpy is not None:
+            return numpy.frombuffer(data, dtype='<u8') >> numpy.uint64(1)
+        return [value >> 1 for value in struct.unpack(
+            '<{}Q'.format(count), data)]
+
+
+@implementer(ISeedSource)
+class RandomSeeds:
+    """Source of ~64bit seeds from the `random` module's shared generator.
+
+    Not fork safe, forked workers share the generator's state unless it's
+    reseeded.
+    """
+
+    def __repr__(self):
+        return '{}()'.format(self.__class__.__name__)
+
+    def __call__(self):
+        return random.getrandbits(64-1)
+
+    def many(self, count):
+        """Return a list of `count` seeds."""
+        getrandbits = random.getrandbits
+        return [getrandbits(64-1) for _ in range(count)]
+
+
+@implementer(ISeedSource)
+class TimeOrderedSeeds:
+    """Source of 63bit seeds ordered by their creation time.
+
+    Seeds are milliseconds since `epoch` in the high bits and `random_bits`
+    random bits below them, so ID's created around the same time are close
+    together in integer space and inserts into integer keyed BTrees, like
+    `HashIDManager(int_keys=True).refs`, append to the same few buckets.
+    Hashid strings aren't ordered, string keyed BTrees don't benefit.
+
+    `many` always takes a run of consecutive seeds, starting at a random
+    value each millisecond, so a batch never collides with itself.  With
+    `counter` set, single seeds count up the same way, so seeds from one
+    source are strictly increasing and never collide.  Otherwise each
+    single seed draws fresh random low bits, and two seeds from the same
+    millisecond collide with probability 2 ** -`random_bits`.
+
+    Concurrent writers appending to the same tail of a BTree conflict more
+    often than with random seeds, give each writer (process, node) its own
+    `shard` in the top `shard_bits` bits to give it its own tail.
+
+    Anyone who can decode the hashids can read their creation time.
+
+    :param random_bits int: (22) Bits below the timestamp, 41 bits of
+        milliseconds are enough for ~69 years from `epoch`.
+    :param counter bool: (False) Count up from a random start instead of
+        drawing random low bits for every seed.
+    :param shard int: (0) Value of the bits above the timestamp.
+    :param shard_bits int: (0) Bits above the timestamp, taken from the
+        timestamp.
+    :param epoch int: (EPOCH) Milliseconds since the unix epoch of time 0.
+    :param entropy ISeedSource: (urandom_seeds) The source of random bits.
+    :return: A TimeOrderedSeeds object.
+    :rtype: :inst:`TimeOrderedSeeds`
+
+    Usage::
+
+        >>> seeds = TimeOrderedSeeds(counter=True)
+        >>> gen = HashIDGenerator(seeds=seeds)
+        >>> seeds.timestamp(gen.decode(gen.new()))
+        1539792000.123
+    """
+
+    def __init__(self, random_bits=22, counter=False, shard=0, shard_bits=0,
+                 epoch=EPOCH, entropy=None):
+        if random_bits < 1 or shard_bits < 0 or random_bits + shard_bits > 62:
+            raise ValueError('random_bits and shard_bits leave no time bits')
+        if not 0 <= shard < 1 << shard_bits:
+            raise ValueError('shard must fit in shard_bits')
+        self.random_bits = random_bits
+        self.counter = counter
+        self.shard = shard
+        self.shard_bits = shard_bits
+        self.epoch = epoch
+        self.entropy = entropy or urandom_seeds
+        self._mask = (1 << random_bits) - 1
+        self._time_bits = 63 - shard_bits - random_bits
+        self._prefix = shard << (63 - shard_bits)
+        self.reset()
+        _sources.add(self)
+
+    def __repr__(self):
+        return '{}(random_bits={!r}, counter={!r}, shard={!r})'.format(
+            self.__class__.__name__, self.random_bits, self.counter,
+            self.shard)
+
+    def reset(self):
+        """Forget the last counter value and replace the lock."""
+        self._lock = threading.Lock()
+        self._last = -1
+
+    def _now(self):
+        """Return the shard and current time shifted into the high bits."""
+        elapsed = int(time.time() * 1000) - self.epoch
+        if not 0 <= elapsed < 1 << self._time_bits:
+            raise OverflowError('time out of range for the time bits')
+        return self._prefix | elapsed << self.random_bits
+
+    def _reserve(self, count):
+        """Return the first of `count` consecutive seeds."""
+        with self._lock:
+            now = self._now()
+            if now > self._last:
+                # Start in the lower half so the count rarely carries.
+                start = now | self.entropy() & self._mask >> 1
+            else:
+                start = self._last + 1
+            self._last = start + count - 1
+            return start
+
+    def timestamp(self, seed):
+        """Return the POSIX timestamp `seed` was created at."""
+        elapsed = int(seed) >> self.random_bits & (1 << self._time_bits) - 1
+        return (elapsed + self.epoch) / 1000
+
+    def __call__(self):
+        if self.counter:
+            return self._reserve(1)
+        return self._now() | self.entropy() & self._mask
+
+    def many(self, count):
+        """Return `count` consecutive seeds, a uint64 array with numpy."""
+        start = self._reserve(count)
+        numpy = get_numpy()
+        if numpy is not None:
+            return numpy.arange(start, start + count, dtype='<u8')
+        return list(range(start, start + count))
+
+
+urandom_seeds = UrandomSeeds()
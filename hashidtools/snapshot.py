@@ -0,0 +1,138 @@
+"""
+hashidtools.snapshot
+~~~~~~~~~~~~~~~~
+
+Compact binary dump and load of :class:`HashIDManager` registrations.
+
+A snapshot is a 16 byte header, the magic `HIDS`, a version, flags and the
+count, then a record per registration of its integer key and an 8 byte
+object reference, both little-endian, in `refs` key order, and a trailing
+crc32 of everything before it.  References default to ZODB oids, so a
+manager can be restored against a copy of the database without loading or
+re-registering its objects.
+
+Usage::
+
+    >>> from hashidtools import snapshot
+    >>> with open('ids.snapshot', 'wb') as fd:
+    ...     snapshot.dump(intid, fd)
+    >>> with open('ids.snapshot', 'rb') as fd:
+    ...     snapshot.load(restored, fd, connection.get)
+
+:copyright: (c) 2018 by Joseph Black.
+:license: MIT, see LICENSE for more details.
+"""
+
+import struct
+import zlib
+from itertools import islice
+
+MAGIC = b'HIDS'
+VERSION = 1
+INT_KEYS = 1
+HEADER = struct.Struct('<4sHHQ')
+RECORD = struct.Struct('<Q8s')
+TRAILER = struct.Struct('<I')
+CHUNK_SIZE = 65536
+
+
+def oid(obj):
+    """Return the ZODB oid of `obj`, the default snapshot reference."""
+    ref = getattr(obj, '_p_oid', None)
+    if ref is None:
+        raise ValueError('{!r} has no oid, commit it first'.format(obj))
+    return ref
+
+
+def _read(fd, size):
+    data = fd.read(size)
+    if len(data) != size:
+        raise ValueError('truncated snapshot')
+    return data
+
+
+def dump(intid, fd, reference=oid):
+    """Write the registrations of `intid` to the binary file `fd`.
+
+    Streams `refs` in key order, `CHUNK_SIZE` records at a time.  Returns
+    the number of registrations written.
+
+    :param intid HashIDManager: The manager to dump.
+    :param fd file: A file open for binary writing.
+    :param reference callable: (oid) Returns an 8 byte reference to an
+        object, which `load`'s `resolve` turns back into the object.
+    """
+    int_keys = intid.int_keys
+    count = len(intid.refs)
+    header = HEADER.pack(MAGIC, VERSION, INT_KEYS if int_keys else 0, count)
+    fd.write(header)
+    checksum = zlib.crc32(header)
+
+    decode_many = intid.key_generator.decode_many
+    items = intid.refs.iteritems()
+    written = 0
+    while True:
+        chunk = list(islice(items, CHUNK_SIZE))
+        if not chunk:
+            break
+        keys = [key for key, _ in chunk]
+        if not int_keys:
+            keys = decode_many(keys)
+        refs = [reference(obj) for _, obj in chunk]
+        if any(len(ref) != 8 for ref in refs):
+            raise ValueError('references must be 8 bytes')
+        data = b''.join(map(RECORD.pack, keys, refs))
+        fd.write(data)
+        checksum = zlib.crc32(data, checksum)
+        written += len(chunk)
+
+    if written != count:
+        raise RuntimeError('refs changed during dump')
+    fd.write(TRAILER.pack(checksum))
+    return count
+
+
+def load(intid, fd, resolve):
+    """Replace the registrations of `intid` with a snapshot read from `fd`.
+
+    The new `refs` is built from the sorted records in a single pass of
+    bulk `update`s, without firing events, and only replaces the current
+    one once the checksum is verified.  Returns the number of registrations
+    loaded.
+
+    :param intid HashIDManager: The manager to load into, of either key mode.
+    :param fd file: A file open for binary reading.
+    :param resolve callable: Returns the object for an 8 byte reference,
+        such as `connection.get` for oids.
+    """
+    header = _read(fd, HEADER.size)
+    magic, version, flags, count = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a HashIDManager snapshot')
+    checksum = zlib.crc32(header)
+
+    int_keys = intid.int_keys
+    # Records are in the dumped manager's key order.
+    ordered = bool(flags & INT_KEYS) == int_keys
+    encode_many = intid.key_generator.encode_many
+    refs = intid.new_refs()
+    remaining = count
+    while remaining:
+        size = min(remaining, CHUNK_SIZE)
+        data = _read(fd, size * RECORD.size)
+        checksum = zlib.crc32(data, checksum)
+        records = list(RECORD.iter_unpack(data))
+        keys = [key for key, _ in records]
+        if not int_keys:
+            keys = encode_many(keys)
+        pairs = list(zip(keys, [resolve(ref) for _, ref in records]))
+        if not ordered:
+            pairs.sort(key=lambda pair: pair[0])
+        refs.update(pairs)
+        remaining -= size
+
+    stored, = TRAILER.unpack(_read(fd, TRAILER.size))
+    if stored != checksum:
+        raise ValueError('snapshot checksum mismatch')
+    intid.replace_refs(refs)
+    return count
@@ -8,26 +8,45 @@ Miscellaneous HashID Tools
 :license: MIT, see LICENSE for more details.
 """
 
-import random
+import heapq
+import os
+import sys
+import threading
+import zlib
+from collections import deque
+from itertools import islice
 from typing import ClassVar, Union
-from weakref import WeakKeyDictionary
+from weakref import finalize, ref as weakref
 
-import hashids
 from zope.interface import implementer
-from zope.component import queryUtility
 from zope.event import notify
-from zope.intid.interfaces import IntIdMissingError
+from zope.intid.interfaces import IntIdMissingError, ObjectMissingError
 from zope.security.proxy import removeSecurityProxy as unwrap
 from zc.intid.interfaces import (
     IIntIds, IntIdInUseError, AddedEvent, RemovedEvent)
 from zc.intid.utility import IntIds
 import BTrees
+from BTrees.Length import Length
 import attr
 from attr.validators import instance_of
 
 from .interfaces import IHashIDGenerator, IHashID
+from .codec import get_codec
+from .seeds import urandom_seeds
+from .lookup import get_generator
+from .fields import LAZY, LazyHashIDAttribute, _lazy_or_str
+from .events import IdsAddedEvent, IdsRemovedEvent
+from .filters import BloomFilter
+from .metrics import increment, timed
 from .exceptions import InvalidHashID, IDRegisterError
 
+_notify = timed('manager.notify')(notify)
+
+# Approximate keys per `refs` bucket.  An out of date collision filter is
+# rebuilt once the direct checks of `refs` made since cost about as many
+# bucket loads as rebuilding it.
+FILTER_BUCKET_SIZE = 32
+
 
 @implementer(IHashIDGenerator)
 @attr.s(frozen=True)
@@ -36,6 +55,7 @@ class HashIDGenerator:
 
     :param salt str: A short string to use as the unique salt.
     :param min_length int: (32) The minimum length of of the generated HashID.
+    :param seeds ISeedSource: (urandom_seeds) The source of random seeds.
     :return: a HashIDGenerator object.
     :rtype: :inst:`HashIDGenerator`
 
@@ -70,31 +90,209 @@ class HashIDGenerator:
         validator=instance_of(str),
         repr=False
     )
+    seeds = attr.ib(
+        default=urandom_seeds,
+        repr=False,
+        cmp=False)
 
     def __attrs_post_init__(self):
         super(HashIDGenerator, self).__setattr__(
-            '_gen', hashids.Hashids(self.salt, self.min_length, self.alphabet))
+            '_gen', get_codec(self.salt, self.min_length, self.alphabet))
 
     def __call__(self):
         return self.new()
 
     def seed(self):
         """Return a randomly generated ~64bit int seed."""
-        return random.getrandbits(64-1)
+        return self.seeds()
 
+    @timed('generator.encode')
     def encode(self, value):
         """HashID encode an integer value."""
         return self._gen.encode(value)
 
+    @timed('generator.new')
     def new(self, seed=None):
         """Return a new hashid value."""
         seed = seed or self.seed()
         return self.encode(seed)
 
+    @timed('generator.decode')
     def decode(self, hashid):
         """Decode a hashid value to it's base integer."""
         return self._gen.decode(hashid)[0]
 
+    def encode_into(self, buf, offset, value):
+        """HashID encode an integer value into a writable buffer.
+
+        Returns the number of bytes written to `buf` at `offset`.
+        """
+        return self._gen.encode_into(buf, offset, value)
+
+    def decode_from(self, buf, offset=0, length=None):
+        """Decode the hashid at `offset` in a buffer to it's base integer.
+
+        The hashid is `length` bytes, by default `min_length`.
+        """
+        return self._gen.decode_from(buf, offset, length)[0]
+
+    def encode_packed(self, values, width=None):
+        """Return a bytearray of hashids of `values`, `width` bytes each."""
+        return self._gen.encode_packed(values, width)
+
+    def decode_packed(self, buf, width=None):
+        """Decode a buffer of packed `width` byte hashids to integers."""
+        return [numbers[0] for numbers in self._gen.decode_packed(buf, width)]
+
+    def new_many(self, count):
+        """Return a list of `count` new hashid values."""
+        return self._gen.encode_many(self.seeds.many(count))
+
+    def encode_many(self, values):
+        """HashID encode an iterable or array of integer values."""
+        return self._gen.encode_many(values)
+
+    def decode_many(self, hashids):
+        """Decode an iterable or array of hashid values to their integers.
+
+        Returns a uint64 array when passed an array, otherwise a list.
+        """
+        numpy = sys.modules.get('numpy')
+        if numpy is not None and isinstance(hashids, numpy.ndarray):
+            return numpy.array(
+                self.decode_many(hashids.tolist()), dtype=numpy.uint64)
+        return [numbers[0] for numbers in self._gen.decode_many(hashids)]
+
+
+def _refill_pool(generator_ref, wanted, stopped):
+    """Refill loop of a `PooledHashIDGenerator` background thread.
+
+    Only a weak reference to the generator is held between refills, so the
+    loop exits once the generator is closed or garbage collected.
+    """
+    while True:
+        wanted.wait()
+        wanted.clear()
+        generator = generator_ref()
+        if generator is None or stopped.is_set():
+            return
+        generator.fill()
+        del generator
+
+
+def _stop_refill(wanted, stopped):
+    stopped.set()
+    wanted.set()
+
+
+@implementer(IHashIDGenerator)
+@attr.s(frozen=True)
+class PooledHashIDGenerator(HashIDGenerator):
+    """Generator of HashID encoded ID's, served from a pre-generated pool.
+
+    New ID's are encoded in bulk and popped from a bounded pool.  When the
+    pool drops below `low_watermark` it is refilled up to `high_watermark`,
+    either by a background thread or inline in a single chunk.  The pool is
+    discarded in forked children so processes never share ID's.  The refill
+    thread exits on `close` or when the generator is garbage collected.
+
+    :param salt str: A short string to use as the unique salt.
+    :param min_length int: (32) The minimum length of of the generated HashID.
+    :param low_watermark int: (1024) Pool size that triggers a refill.
+    :param high_watermark int: (8192) Pool size to refill up to.
+    :param background bool: (True) Refill from a background thread.
+    :return: a PooledHashIDGenerator object.
+    :rtype: :inst:`PooledHashIDGenerator`
+
+    Usage::
+
+        >>> from hashidtools import PooledHashIDGenerator
+        >>> gen = PooledHashIDGenerator(low_watermark=100, high_watermark=1000)
+        >>> gen()
+        '...'
+    """
+
+    low_watermark: int = attr.ib(
+        default=1024,
+        converter=int,
+        validator=instance_of(int))
+    high_watermark: int = attr.ib(
+        default=8192,
+        converter=int,
+        validator=instance_of(int))
+    background: bool = attr.ib(
+        default=True,
+        validator=instance_of(bool),
+        repr=False)
+
+    @high_watermark.validator
+    def _check_high_watermark(self, attribute, value):
+        if not 0 <= self.low_watermark < value:
+            raise ValueError(
+                'high_watermark must be greater than low_watermark')
+
+    def __attrs_post_init__(self):
+        super(PooledHashIDGenerator, self).__attrs_post_init__()
+        self._reset()
+
+    def _reset(self):
+        object.__setattr__(self, '_pid', os.getpid())
+        object.__setattr__(self, '_pool', deque())
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_wanted', threading.Event())
+        object.__setattr__(self, '_stopped', threading.Event())
+        object.__setattr__(self, '_thread', None)
+
+    def fill(self):
+        """Refill the pool up to `high_watermark`."""
+        with self._lock:
+            count = self.high_watermark - len(self._pool)
+            if count > 0:
+                self._pool.extend(self.new_many(count))
+
+    def close(self):
+        """Stop the background refill thread, later refills happen inline."""
+        _stop_refill(self._wanted, self._stopped)
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _request_fill(self):
+        if not self.background or self._stopped.is_set():
+            self.fill()
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    thread = threading.Thread(
+                        target=_refill_pool,
+                        args=(weakref(self), self._wanted, self._stopped),
+                        name='hashidtools-pool', daemon=True)
+                    object.__setattr__(self, '_thread', thread)
+                    finalize(self, _stop_refill, self._wanted, self._stopped)
+                    thread.start()
+        self._wanted.set()
+
+    @timed('generator.new')
+    def new(self, seed=None):
+        """Return a new hashid value, from the pool unless given a seed."""
+        if seed:
+            return self.encode(seed)
+        if self._pid != os.getpid():
+            self._reset()
+
+        pool = self._pool
+        while True:
+            try:
+                hashid = pool.popleft()
+            except IndexError:
+                self.fill()
+            else:
+                break
+        if len(pool) < self.low_watermark:
+            self._request_fill()
+        return hashid
+
 
 @implementer(IHashID)
 @attr.s(frozen=True, hash=False, repr=False, cmp=False)
@@ -119,7 +317,7 @@ class HashID:
 
     @id.default
     def _default_id(self):
-        return queryUtility(IHashIDGenerator)()
+        return get_generator()()
 
     def __hash__(self):
         return hash(str(self.id))
@@ -149,7 +347,172 @@ class HashID:
         return str(self.id)
 
     def __int__(self):
-        return queryUtility(IHashIDGenerator).decode(self.id)
+        return self.to_int()
+
+    def __getstate__(self):
+        return {'id': self.id}
+
+    def __setstate__(self, state):
+        object.__setattr__(self, 'id', state['id'])
+
+    def to_int(self, generator=None):
+        """Return the integer value, decoded with `generator` if passed.
+
+        The value is decoded once and cached on the instance together with
+        the generator that decoded it, later casts reuse it while that's
+        still the generator, or registered one, they'd decode with.
+        """
+        if generator is None:
+            generator = get_generator()
+        decoded = self.__dict__.get('_decoded')
+        if decoded is not None and (
+                decoded[0] is generator or decoded[0] == generator):
+            return decoded[1]
+        value = generator.decode(self.id)
+        object.__setattr__(self, '_decoded', (generator, value))
+        return value
+
+
+class LazyHashID(HashID):
+    """HashID generating its ID on first use instead of in `__init__`.
+
+    Objects that are created and thrown away without their ID being read,
+    hashed, compared or pickled never generate one.
+
+    :param id str: (LAZY) A short string representing the HashID.
+    :return: A LazyHashID object.
+    :rtype: :inst:`LazyHashID`
+
+    Usage::
+
+        >>> from hashidtools import LazyHashID
+        >>> hashid = LazyHashID()
+        >>> hashid.generated
+        False
+        >>> hashid
+        '8nKqkABjlYB5A7430M917zAJao1Me4mN'
+        >>> hashid.generated
+        True
+    """
+
+    id = LazyHashIDAttribute('_id')
+
+    def __init__(self, id=LAZY):  # pylint: disable=redefined-builtin
+        _lazy_or_str(self, attr.fields(HashID).id, id)
+        object.__setattr__(self, '_id', id)
+
+    @property
+    def generated(self):
+        """Whether the ID was passed or generated."""
+        return self.__dict__['_id'] is not LAZY
+
+    def __setstate__(self, state):
+        object.__setattr__(self, '_id', state['id'])
+
+
+@implementer(IHashID)
+@attr.s(slots=True, frozen=True, hash=False, repr=False, cmp=False)
+class CompactHashID:
+    """Compact HashID type storing the 64bit integer instead of the string.
+
+    The string form is encoded lazily on demand and not kept.  Like
+    :class:`HashID`, instances compare, order and hash by the string form,
+    so they mix freely with strings and HashID's, the string hash is
+    computed once.  Instances with equal generators compare equal by their
+    integers without encoding.  Ordering encodes both sides on every
+    comparison, sort with ``key=str`` to encode each instance once.
+    Pickles keep the generator's settings.
+
+    :param value int: The integer value of the HashID.
+    :param generator IHashIDGenerator: (None) The generator used to encode
+        the value, defaults to the registered utility.
+    :return: A CompactHashID object.
+    :rtype: :inst:`CompactHashID`
+
+    Usage::
+
+        >>> from hashidtools import CompactHashID
+        >>> CompactHashID.from_hashid('8nKqkABjlYB5A7430M917zAJao1Me4mN')
+        '8nKqkABjlYB5A7430M917zAJao1Me4mN'
+        >>> int(CompactHashID.from_hashid('8nKqkABjlYB5A7430M917zAJao1Me4mN'))
+        ...
+    """
+
+    value: int = attr.ib(validator=instance_of(int))
+    generator = attr.ib(default=None, repr=False)
+    _hash = attr.ib(default=None, init=False, repr=False)
+
+    @classmethod
+    def from_hashid(cls, hashid, generator=None):
+        """Return a CompactHashID from a hashid string or HashID."""
+        if generator is None:
+            generator = get_generator()
+        return cls(generator.decode(str(hashid)), generator)
+
+    @property
+    def id(self):
+        """The hashid string."""
+        return str(self)
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(str(self)))
+        return self._hash
+
+    def __len__(self):
+        return len(str(self))
+
+    def __eq__(self, other):
+        if isinstance(other, CompactHashID) and (
+                self.generator is other.generator or
+                self.generator == other.generator):
+            return self.value == other.value
+        if isinstance(other, (str, HashID, CompactHashID)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __gt__(self, other):
+        if isinstance(other, (str, HashID, CompactHashID)):
+            return str(self) > str(other)
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, (str, HashID, CompactHashID)):
+            return str(self) < str(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __str__(self):
+        generator = self.generator
+        if generator is None:
+            generator = get_generator()
+        return generator.encode(self.value)
+
+    def __int__(self):
+        return self.value
+
+    def __reduce__(self):
+        generator = self.generator
+        if generator is None:
+            return self.__class__, (self.value,)
+        return _compact_hashid, (
+            self.value, generator.salt, generator.min_length,
+            generator.alphabet)
+
+    def to_int(self, generator=None):
+        """Return the integer value."""
+        return self.value
+
+
+def _compact_hashid(value, salt, min_length, alphabet):
+    """Unpickle a CompactHashID, rebuilding it's generator."""
+    return CompactHashID(value, HashIDGenerator(salt, min_length, alphabet))
 
 
 # https://media.readthedocs.org/pdf/zopecatalog/latest/zopecatalog.pdf
@@ -159,6 +522,18 @@ class HashIDManager(IntIds):
     """HashID IntId Manager.
 
     :param BTrees.family type: A short string representing the HashID.
+    :param int_keys bool: (False) Key `refs` by the decoded integer in an
+        `LO` BTree instead of by the hashid string, see :meth:`migrate`.
+        The registered generator's settings are pinned as `key_generator`,
+        so overriding the utility later doesn't change the keys.
+    :param collision_filter bool: (False) Keep an in-memory Bloom filter of
+        `refs` so that checking unused ID's doesn't load BTree buckets.  It's
+        rebuilt when `refs` is replaced or another connection adds ID's.
+    :param max_retries int: (10) Times to regenerate an ID found in use,
+        with `collision_filter` set.
+    :param id_cache int: (0) Cache the ID's of up to this many live objects
+        by identity for `getId`, evicting the oldest.  Kept up to date by
+        `register`/`unregister`, not by setting the ID attribute directly.
     :return: A HashIDManager object.
     :rtype: :inst:`HashIDManager`
 
@@ -203,35 +578,567 @@ class HashIDManager(IntIds):
     attribute: str = attr.ib(
         default='id',
         validator=instance_of(str))
+    int_keys: bool = attr.ib(
+        default=False,
+        validator=instance_of(bool),
+        repr=False)
+    collision_filter: bool = attr.ib(
+        default=False,
+        validator=instance_of(bool),
+        repr=False)
+    max_retries: int = attr.ib(
+        default=10,
+        converter=int,
+        validator=instance_of(int),
+        repr=False)
+    id_cache: int = attr.ib(
+        default=0,
+        converter=int,
+        validator=instance_of(int),
+        repr=False)
+
+    _v_filter = None
+    _v_filter_state = None
+    _v_ids = None
+    # Count of ID's added with `collision_filter` set, conflict free.
+    _adds = None
+    # (salt, min_length, alphabet) of the generator integer keys are
+    # decoded and encoded with.
+    _key_codec = None
+    _v_key_generator = None
 
     def __attrs_post_init__(self):
         self.ids = self.family.OO.BTree()
-        self.refs = self.family.OO.BTree()
+        self.refs = self._make_refs(self.int_keys)
+        self._adds = Length()
+        if self.int_keys:
+            self._pin(get_generator())
+
+    def _pin(self, generator):
+        """Pin the settings of `generator` as the `key_generator`."""
+        if generator is None:
+            self._key_codec = None
+        else:
+            self._key_codec = (
+                generator.salt, generator.min_length, generator.alphabet)
+        self._v_key_generator = generator
+
+    @property
+    def key_generator(self):
+        """The generator ID's are generated, decoded and encoded with.
+
+        The pinned one of an integer keyed manager, the registered utility
+        otherwise.
+        """
+        codec = self._key_codec
+        if codec is None:
+            return get_generator()
+        generator = self._v_key_generator
+        if generator is None:
+            generator = self._v_key_generator = HashIDGenerator(*codec)
+        return generator
+
+    def _make_refs(self, int_keys):
+        """Return an empty `refs` mapping."""
+        if int_keys:
+            return self.family.IO.BTree()
+        return self.family.OO.BTree()
+
+    def new_refs(self):
+        """Return an empty `refs` mapping keyed like the current one."""
+        return self._make_refs(self._int_keys)
+
+    def replace_refs(self, refs):
+        """Replace `refs`, dropping the caches built from the old one."""
+        self.refs = refs
+        self._v_filter = None
+        self._v_filter_state = None
+        self._v_ids = None
+
+    @property
+    def _int_keys(self):
+        # Derived from storage so stores pickled before `int_keys` still work.
+        return not isinstance(self.refs, self.family.OO.BTree)
+
+    def _key(self, uid):
+        """Return the `refs` key for the hashid `uid`."""
+        if not self._int_keys:
+            return uid
+        try:
+            return self.key_generator.decode(str(uid))
+        except IndexError:
+            # Never registered, seeds are non-negative.
+            return -1
+
+    def _uid(self, key):
+        """Return the hashid for the `refs` key `key`."""
+        if not self._int_keys:
+            return key
+        return self.key_generator.encode(key)
+
+    def __iter__(self):
+        if not self._int_keys:
+            return self.refs.iterkeys()
+        return map(self.key_generator.encode, self.refs.iterkeys())
+
+    def items(self):
+        return [(self._uid(key), obj) for key, obj in self.refs.items()]
+
+    def _batches(self, min, max, after, batch, items):
+        """Yield lists of up to `batch` keys, or items, of `refs` in order.
+
+        Each batch is a fresh range query starting after the previous one,
+        so `refs` may change between batches.
+        """
+        if batch < 1:
+            raise ValueError('batch must be positive')
+        start = after if after is not None else min
+        low = None if start is None else self._key(start)
+        high = None if max is None else self._key(max)
+        exclude = after is not None
+        query = self.refs.iteritems if items else self.refs.iterkeys
+        while True:
+            if low is None:
+                chunk = list(islice(query(None, high), batch))
+            else:
+                chunk = list(islice(
+                    query(low, high, excludemin=exclude), batch))
+            if chunk:
+                yield chunk
+            if len(chunk) < batch:
+                return
+            low = chunk[-1][0] if items else chunk[-1]
+            exclude = True
+
+    def _uids(self, keys):
+        if not self._int_keys:
+            return keys
+        return self.key_generator.encode_many(keys)
+
+    def iter_ids(self, min=None, max=None, after=None, batch=1000):
+        """Yield registered ID's in `refs` key order.
+
+        Hashids are ordered as strings, or by their integers with
+        `int_keys` set.
+
+        :param min str: (None) The first ID in the range.
+        :param max str: (None) The last ID in the range.
+        :param after str: (None) Resume after this ID, the cursor, which is
+            the last ID yielded by an earlier iteration.
+        :param batch int: (1000) Keys read from `refs` per range query.
+        """
+        for keys in self._batches(min, max, after, batch, False):
+            yield from self._uids(keys)
+
+    def iter_objects(self, min=None, max=None, after=None, batch=1000,
+                     deactivate=False):
+        """Yield `(id, object)` pairs of registrations in `refs` key order.
+
+        Takes the same range and cursor arguments as :meth:`iter_ids`.
+        With `deactivate` set, each batch of persistent objects is turned
+        back into ghosts, and the connection's cache garbage collected,
+        before the next batch is loaded so memory stays flat.
+        """
+        for items in self._batches(min, max, after, batch, True):
+            objs = [obj for _, obj in items]
+            yield from zip(self._uids([key for key, _ in items]), objs)
+            if deactivate:
+                for obj in objs:
+                    if getattr(obj, '_p_jar', None) is not None:
+                        obj._p_deactivate()
+                if self._p_jar is not None:
+                    self._p_jar.cacheGC()
+
+    @timed('manager.getObject')
+    def getObject(self, id):
+        """Return the object registered to the passed ID."""
+        try:
+            return super(HashIDManager, self).getObject(self._key(id))
+        except ObjectMissingError:
+            raise ObjectMissingError(id)
+
+    def queryObject(self, id, default=None):
+        """Return the object registered to the passed ID, or `default`."""
+        return super(HashIDManager, self).queryObject(self._key(id), default)
+
+    def migrate(self, int_keys=True):
+        """Rebuild `refs` keyed by decoded integers, or by hashid strings.
+
+        The hashids are decoded with the registered generator, which must be
+        the one that generated them, and it's pinned as `key_generator`.
+        Integers are encoded back with the pinned generator.
+        """
+        if int_keys == self._int_keys:
+            return
+        refs = self._make_refs(int_keys)
+        if int_keys:
+            generator = get_generator()
+            convert = generator.decode
+        else:
+            generator = None
+            convert = self.key_generator.encode
+        for key, obj in self.refs.items():
+            refs[convert(key)] = obj
+        self.replace_refs(refs)
+        self.int_keys = int_keys
+        self._pin(generator)
+
+    def __setstate__(self, state):
+        # Fill in fields added since the manager was pickled.
+        state = dict(state)
+        for field in attr.fields(type(self)):
+            if field.name not in state and not isinstance(
+                    field.default, attr.Factory):
+                state[field.name] = field.default
+        super(HashIDManager, self).__setstate__(state)
+
+    def _filter(self):
+        """Return the collision filter, None while it's out of date.
+
+        The filter is kept with the `refs` it was built from, the count of
+        adds it has seen and the number of checks made while out of date.
+        When the count doesn't match, another connection added ID's that
+        aren't in it and callers check `refs` directly.  Building it reads
+        every bucket of `refs`, so it's only rebuilt when missing or stale,
+        or once the direct checks add up to about as many bucket loads.
+        """
+        bloom = self._v_filter
+        state = self._v_filter_state
+        adds = 0 if self._adds is None else self._adds()
+        if bloom is not None and not bloom.stale and state[0] is self.refs:
+            if state[1] == adds:
+                return bloom
+            if state[2] < max(len(bloom) // FILTER_BUCKET_SIZE, 64):
+                self._v_filter_state = (state[0], state[1], state[2] + 1)
+                return None
+
+        keys = list(self.refs.keys())
+        bloom = BloomFilter(capacity=max(2 * len(keys), 1024))
+        bloom.update(keys)
+        self._v_filter = bloom
+        self._v_filter_state = (self.refs, adds, 0)
+        return bloom
+
+    def _in_use(self, key, obj=None):
+        """Whether `key` is registered to an object other than `obj`."""
+        if self.collision_filter:
+            bloom = self._filter()
+            if bloom is not None and key not in bloom:
+                return False
+        return self.refs.get(key, obj) is not obj
+
+    def _track(self, key):
+        if not self.collision_filter:
+            return
+        if self._adds is None:
+            self._adds = Length()
+        self._adds.change(1)
+        if self._v_filter is not None:
+            self._v_filter.add(key)
+            refs, adds, checks = self._v_filter_state
+            self._v_filter_state = (refs, adds + 1, checks)
+
+    def _untrack(self, key):
+        if self._v_filter is not None:
+            self._v_filter.discard(key)
 
     def generateId(self, obj=None):
-        """Generate ID."""
-        return queryUtility(IHashIDGenerator)()
+        """Generate ID.
+
+        With `collision_filter` set, ID's already in use are regenerated up
+        to `max_retries` times.
+        """
+        generate = self.key_generator
+        if not self.collision_filter:
+            return generate()
+        for _ in range(self.max_retries + 1):
+            uid = generate()
+            if not self._in_use(self._key(uid)):
+                return uid
+            increment('manager.collisions')
+        raise IntIdInUseError("id generator returned used ids")
+
+    def _cache_id(self, obj, uid):
+        """Cache `uid` as the ID of `obj` while it's alive."""
+        cache = self._v_ids
+        if cache is None:
+            if self.id_cache <= 0:
+                return
+            cache = self._v_ids = {}
+        key = id(obj)
+        try:
+            ref = weakref(obj, lambda _, key=key: cache.pop(key, None))
+        except TypeError:
+            # Not weakly referenceable.
+            return
+        if key not in cache and len(cache) >= self.id_cache:
+            try:
+                del cache[next(iter(cache))]
+            except (KeyError, RuntimeError, StopIteration):
+                # Changed by another thread, the cap is approximate.
+                pass
+        cache[key] = (ref, uid)
+
+    def _uncache_id(self, obj):
+        if self._v_ids is not None:
+            self._v_ids.pop(id(obj), None)
 
     def getId(self, obj):
         """Return the ID for passed object."""
         unwrapped = unwrap(obj)
+        cache = self._v_ids
+        if cache is not None:
+            entry = cache.get(id(unwrapped))
+            if entry is not None and entry[0]() is unwrapped:
+                return entry[1]
+
         uid = getattr(unwrapped, self.attribute, None)
-        if not isinstance(uid, str):
-            uid = str(uid)
         if uid is None:
             raise IntIdMissingError(obj)
+        if not isinstance(uid, str):
+            uid = str(uid)
+        if self.id_cache > 0:
+            self._cache_id(unwrapped, uid)
         return uid
 
+    @timed('manager.register')
     def register(self, obj):
         """Register objects to ID."""
         obj = unwrap(obj)
         uid = self.queryId(obj)
         if uid is None:
             uid = self.generateId(obj)
-            if uid in self.refs:
+            if self._in_use(self._key(uid)):
+                increment('manager.collisions')
                 raise IntIdInUseError("id generator returned used id")
         if uid != getattr(obj, self.attribute):
             raise IDRegisterError(f'uid: {uid} != obj.id: {obj.id}')
-        self.refs[uid] = obj
-        notify(AddedEvent(obj, self, uid))
+        key = self._key(uid)
+        if key == -1:
+            raise IDRegisterError(f'uid: {uid} is not a key_generator id')
+        if self.collision_filter and self._in_use(key, obj):
+            increment('manager.collisions')
+            raise IntIdInUseError(f'uid: {uid} is used by another object')
+        self.refs[key] = obj
+        self._track(key)
+        self._cache_id(obj, uid)
+        increment('manager.added')
+        _notify(AddedEvent(obj, self, uid))
         return uid
+
+    @timed('manager.register_many')
+    def register_many(self, objs, batch_event=False):
+        """Register a batch of objects to their IDs.
+
+        The whole batch is validated before anything is inserted, then
+        inserted with a single BTree update.  Fires one `IdsAddedEvent` if
+        `batch_event` is set, otherwise an `AddedEvent` per object.
+        """
+        objs = [unwrap(obj) for obj in objs]
+        uids = []
+        pairs = {}
+        for obj in objs:
+            uid = self.queryId(obj)
+            if uid is None:
+                uid = self.generateId(obj)
+                if self._in_use(self._key(uid)):
+                    increment('manager.collisions')
+                    raise IntIdInUseError("id generator returned used id")
+            if uid != getattr(obj, self.attribute):
+                raise IDRegisterError(f'uid: {uid} != obj.id: {obj.id}')
+            key = self._key(uid)
+            if key == -1:
+                raise IDRegisterError(f'uid: {uid} is not a key_generator id')
+            if pairs.get(key, obj) is not obj:
+                raise IntIdInUseError(f'uid: {uid} used twice in batch')
+            if self.collision_filter and self._in_use(key, obj):
+                increment('manager.collisions')
+                raise IntIdInUseError(f'uid: {uid} is used by another object')
+            pairs[key] = obj
+            uids.append(uid)
+
+        self.refs.update(sorted(pairs.items(), key=lambda pair: pair[0]))
+        for key in pairs:
+            self._track(key)
+        for obj, uid in zip(objs, uids):
+            self._cache_id(obj, uid)
+        increment('manager.added', len(pairs))
+        if batch_event:
+            _notify(IdsAddedEvent(objs, self, uids))
+        else:
+            for obj, uid in zip(objs, uids):
+                _notify(AddedEvent(obj, self, uid))
+        return uids
+
+    @timed('manager.unregister_many')
+    def unregister_many(self, objs, batch_event=False):
+        """Unregister a batch of objects from their IDs.
+
+        Fires one `IdsRemovedEvent` if `batch_event` is set, otherwise a
+        `RemovedEvent` per object.
+        """
+        objs = [unwrap(obj) for obj in objs]
+        removed = []
+        for obj in objs:
+            uid = self.queryId(obj)
+            if uid is None:
+                continue
+            if self._key(uid) not in self.refs:
+                raise KeyError(uid)
+            removed.append((obj, uid))
+
+        for obj, uid in removed:
+            key = self._key(uid)
+            del self.refs[key]
+            self._untrack(key)
+            self._uncache_id(obj)
+            setattr(obj, self.attribute, None)
+        increment('manager.removed', len(removed))
+        if batch_event:
+            _notify(IdsRemovedEvent(
+                [obj for obj, _ in removed], self,
+                [uid for _, uid in removed]))
+        else:
+            for obj, uid in removed:
+                _notify(RemovedEvent(obj, self, uid))
+
+    @timed('manager.unregister')
+    def unregister(self, obj):
+        """Unregister objects from ID."""
+        obj = unwrap(obj)
+        uid = self.queryId(obj)
+        if uid is None:
+            return
+        key = self._key(uid)
+        del self.refs[key]
+        self._untrack(key)
+        self._uncache_id(obj)
+        setattr(obj, self.attribute, None)
+        increment('manager.removed')
+        _notify(RemovedEvent(obj, self, uid))
+
+
+def shard_of(key, shards):
+    """Return the index of the shard, out of `shards`, that owns `key`.
+
+    Integer keys are taken modulo `shards`, hashid strings by their crc32.
+    """
+    if isinstance(key, int):
+        return key % shards
+    return zlib.crc32(key.encode()) % shards
+
+
+class ShardedBTree:
+    """BTree-like mapping partitioned across `len(shards)` BTrees.
+
+    Each key lives in one shard picked by a cheap, stable function of the
+    key, so concurrent transactions mostly change different trees.  The
+    shards are persistent, this object isn't and is stored in its owner's
+    state, writes never change it.  Iteration lazily merges the shards in
+    key order.
+
+    :param shards tuple: The shard BTrees, all of the same type.
+    """
+
+    def __init__(self, shards):
+        self.shards = tuple(shards)
+
+    def __repr__(self):
+        return '{}({} shards)'.format(
+            self.__class__.__name__, len(self.shards))
+
+    def index(self, key):
+        """Return the index of the shard for `key`."""
+        return shard_of(key, len(self.shards))
+
+    def shard(self, key):
+        """Return the shard for `key`."""
+        return self.shards[self.index(key)]
+
+    def __getitem__(self, key):
+        return self.shard(key)[key]
+
+    def __setitem__(self, key, value):
+        self.shard(key)[key] = value
+
+    def __delitem__(self, key):
+        del self.shard(key)[key]
+
+    def __contains__(self, key):
+        return key in self.shard(key)
+
+    def get(self, key, default=None):
+        return self.shard(key).get(key, default)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def __iter__(self):
+        return self.iterkeys()
+
+    def iterkeys(self, *args, **kwargs):
+        """Merge `iterkeys` of the shards, takes the same range arguments."""
+        return heapq.merge(
+            *(shard.iterkeys(*args, **kwargs) for shard in self.shards))
+
+    keys = iterkeys
+
+    def iteritems(self, *args, **kwargs):
+        """Merge `iteritems` of the shards, takes the same range arguments."""
+        return heapq.merge(
+            *(shard.iteritems(*args, **kwargs) for shard in self.shards),
+            key=lambda item: item[0])
+
+    items = iteritems
+
+    def values(self):
+        return (value for _, value in self.iteritems())
+
+    def update(self, items):
+        """Insert sorted `(key, value)` pairs, one `update` per shard."""
+        batches = [[] for _ in self.shards]
+        for key, value in items:
+            batches[self.index(key)].append((key, value))
+        for shard, batch in zip(self.shards, batches):
+            if batch:
+                shard.update(batch)
+
+
+@implementer(IIntIds)
+@attr.s
+class ShardedHashIDManager(HashIDManager):
+    """HashID IntId Manager with `refs` partitioned across `shards` BTrees.
+
+    Registrations by concurrent transactions mostly land in different
+    BTrees, so they conflict less over shared root and interior nodes.
+    Otherwise works like :class:`HashIDManager`.
+
+    :param shards int: (16) The number of `refs` BTrees.
+    :return: A ShardedHashIDManager object.
+    :rtype: :inst:`ShardedHashIDManager`
+
+    Usage::
+
+        >>> intid = ShardedHashIDManager(shards=32, int_keys=True)
+        ... intid.register(obj)
+        '...'
+    """
+
+    shards: int = attr.ib(
+        default=16,
+        converter=int,
+        validator=instance_of(int),
+        repr=False)
+
+    @shards.validator
+    def _check_shards(self, attribute, value):
+        if value < 1:
+            raise ValueError('shards must be positive')
+
+    def _make_refs(self, int_keys):
+        tree = self.family.IO.BTree if int_keys else self.family.OO.BTree
+        return ShardedBTree(tree() for _ in range(self.shards))
+
+    @property
+    def _int_keys(self):
+        return not isinstance(self.refs.shards[0], self.family.OO.BTree)
@@ -54,6 +54,9 @@ setup(
     zip_safe=False,
     packages=find_packages(),
     package_data={'': ['LICENSE']},
+    entry_points={
+        'console_scripts': ['hashidtools = hashidtools.cli:main'],
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
@@ -11,6 +11,16 @@ def test(ctx):
     ctx.run(docker_cmd('pytest'))
 
 
+@task
+def bench(ctx, sizes='10000,100000', output='bench.json', baseline=None,
+          threshold=0.2):
+    cmd = ('python -m benchmarks.bench_suite --sizes {} --output {} '
+           '--threshold {}'.format(sizes, output, threshold))
+    if baseline:
+        cmd += ' --baseline {}'.format(baseline)
+    ctx.run(cmd)
+
+
 @task
 def check(ctx):
     # ctx.run('pyroma .')
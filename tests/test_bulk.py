@@ -0,0 +1,56 @@
+import unittest
+
+from hashidtools import HashIDGenerator, bulk
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestBulk(unittest.TestCase):
+    def makeGenerator(self):
+        return HashIDGenerator(salt='sdfs')
+
+    def sample(self, count=1000):
+        gen = self.makeGenerator()
+        return [gen.seed() for _ in range(count)]
+
+    def test_encode_decode(self):
+        gen = self.makeGenerator()
+        seeds = self.sample()
+        hashids = bulk.encode(seeds, gen, workers=2, chunksize=64)
+        self.assertEqual(hashids, [gen.encode(seed) for seed in seeds])
+        self.assertEqual(bulk.decode(hashids, gen, workers=2, chunksize=64),
+                         seeds)
+
+    def test_inline(self):
+        gen = self.makeGenerator()
+        seeds = self.sample(10)
+        hashids = bulk.encode(iter(seeds), gen, workers=1, chunksize=3)
+        self.assertEqual(hashids, [gen.encode(seed) for seed in seeds])
+        self.assertEqual(bulk.decode(iter(hashids), gen, workers=1), seeds)
+
+    def test_streaming(self):
+        gen = self.makeGenerator()
+        stream = bulk.iter_encode(range(100), gen, workers=2, chunksize=10)
+        self.assertEqual(next(stream), gen.encode(0))
+        self.assertEqual(list(stream), [gen.encode(i) for i in range(1, 100)])
+
+    def test_empty(self):
+        self.assertEqual(bulk.encode([], workers=2), [])
+        self.assertEqual(bulk.decode([], workers=2), [])
+
+    def test_decode_invalid(self):
+        gen = self.makeGenerator()
+        with self.assertRaises(IndexError):
+            bulk.decode(['invalid'], gen, workers=2)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_encode_array(self):
+        gen = self.makeGenerator()
+        seeds = self.sample()
+        hashids = bulk.encode(
+            numpy.array(seeds, dtype=numpy.uint64), gen, workers=2,
+            chunksize=100)
+        self.assertEqual(hashids, [gen.encode(seed) for seed in seeds])
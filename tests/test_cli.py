@@ -0,0 +1,58 @@
+import io
+import unittest
+from unittest import mock
+
+from hashidtools import HashIDGenerator, cli
+
+
+class TestCLI(unittest.TestCase):
+    def run_cli(self, argv, data=b''):
+        stdout = io.BytesIO()
+        status = cli.main(['--salt', 'sdfs'] + argv, io.BytesIO(data), stdout)
+        return status, stdout.getvalue().decode().splitlines()
+
+    def test_encode_decode(self):
+        gen = HashIDGenerator(salt='sdfs')
+        status, hashids = self.run_cli(['encode'], b'1\n2\n\n3\n')
+        self.assertEqual(status, 0)
+        self.assertEqual(hashids, [gen.encode(i) for i in (1, 2, 3)])
+
+        status, values = self.run_cli(
+            ['decode'], '\n'.join(hashids).encode())
+        self.assertEqual((status, values), (0, ['1', '2', '3']))
+
+    def test_workers(self):
+        data = '\n'.join(map(str, range(100))).encode()
+        status, hashids = self.run_cli(['encode', '-j', '2'], data)
+        self.assertEqual(status, 0)
+        self.assertEqual(hashids, self.run_cli(['encode'], data)[1])
+
+        status, values = self.run_cli(
+            ['decode', '-j', '2'], '\n'.join(hashids).encode())
+        self.assertEqual(values, [str(i) for i in range(100)])
+
+    def test_batches(self):
+        data = '\n'.join(map(str, range(1000))).encode()
+        batches = list(cli.read_batches(io.BytesIO(data), 64))
+        self.assertGreater(len(batches), 1)
+        self.assertEqual(sum(batches, []), [str(i) for i in range(1000)])
+
+    def test_validate(self):
+        hashids = HashIDGenerator(salt='sdfs').new_many(3)
+        data = '\n'.join(hashids + ['invalid']).encode()
+        self.assertEqual(self.run_cli(['validate'], data), (1, ['invalid']))
+        data = '\n'.join(hashids).encode()
+        self.assertEqual(self.run_cli(['validate', '--decode'], data), (0, []))
+
+    def test_generate(self):
+        gen = HashIDGenerator(salt='sdfs')
+        status, hashids = self.run_cli(['generate', '10'])
+        self.assertEqual(status, 0)
+        self.assertEqual(len(set(hashids)), 10)
+        self.assertEqual([gen.encode(gen.decode(h)) for h in hashids], hashids)
+
+    def test_invalid_input(self):
+        with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            self.assertEqual(self.run_cli(['encode'], b'one\n')[0], 2)
+            self.assertIn('invalid input', stderr.getvalue())
+            self.assertEqual(self.run_cli(['decode'], b'bad\n')[0], 2)
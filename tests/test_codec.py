@@ -0,0 +1,242 @@
+import random
+import threading
+import unittest
+
+import hashids
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from hashidtools.codec import HashIDCodec, CodecCache, CacheInfo, get_codec
+from hashidtools.types import HashIDGenerator
+
+
+class TestHashIDCodec(unittest.TestCase):
+    def makeOne(self, salt='sdfs', min_length=32, alphabet=None):
+        if alphabet is None:
+            return HashIDCodec(salt, min_length)
+        return HashIDCodec(salt, min_length, alphabet)
+
+    def makeReference(self, salt='sdfs', min_length=32, alphabet=None):
+        if alphabet is None:
+            return hashids.Hashids(salt, min_length)
+        return hashids.Hashids(salt, min_length, alphabet)
+
+    def assertCompatible(self, values, **kwargs):
+        codec = self.makeOne(**kwargs)
+        reference = self.makeReference(**kwargs)
+        for value in values:
+            hashid = reference.encode(value)
+            self.assertEqual(codec.encode(value), hashid)
+            self.assertEqual(codec.decode(hashid), reference.decode(hashid))
+
+    def sample(self, count=500, bits=63):
+        rand = random.Random(1234)
+        return [0, 1, 99, 100, 2 ** bits - 1] + [
+            rand.getrandbits(bits) for _ in range(count)]
+
+    def test_fixture(self):
+        codec = self.makeOne()
+        seed = 1762352222709391612
+        self.assertEqual(codec.encode(seed), 'bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3')
+        self.assertEqual(
+            codec.decode('bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3'), (seed,))
+
+    def test_default_generator_settings(self):
+        self.assertCompatible(
+            self.sample(), salt='$2a$12$AAAAAAAAAAAAAACgpDEPGQ')
+
+    def test_min_lengths(self):
+        for min_length in (0, 1, 8, 16, 32, 64, 128):
+            self.assertCompatible(
+                self.sample(100), salt='salt', min_length=min_length)
+
+    def test_custom_alphabet(self):
+        self.assertCompatible(
+            self.sample(100), alphabet='abcdefghijkl0123456')
+        self.assertCompatible(
+            self.sample(100), alphabet='0123456789ABCDEF')
+
+    def test_large_values(self):
+        self.assertCompatible(self.sample(100, bits=128))
+
+    def test_fallback_multiple_values(self):
+        codec = self.makeOne()
+        reference = self.makeReference()
+        hashid = reference.encode(1, 23, 456)
+        self.assertEqual(codec.encode(1, 23, 456), hashid)
+        self.assertEqual(codec.decode(hashid), (1, 23, 456))
+
+    def test_fallback_invalid_values(self):
+        codec = self.makeOne()
+        self.assertEqual(codec.encode(-1), '')
+        self.assertEqual(codec.encode(), '')
+        self.assertEqual(codec.encode(True), self.makeReference().encode(1))
+
+    def test_decode_invalid(self):
+        codec = self.makeOne()
+        reference = self.makeReference()
+        hashid = codec.encode(1762352222709391612)
+        for value in ('', None, b'abc', 'x' * 32, '_' * 32, hashid[:-1],
+                      hashid[::-1], hashid + 'a', hashid.swapcase()):
+            self.assertEqual(codec.decode(value), reference.decode(value))
+
+    def test_encode_many(self):
+        codec = self.makeOne()
+        values = self.sample()
+        self.assertEqual(
+            codec.encode_many(values), [codec.encode(v) for v in values])
+        self.assertEqual(codec.encode_many([-1, 'a']), ['', ''])
+
+    def test_decode_many(self):
+        codec = self.makeOne()
+        values = self.sample()
+        self.assertEqual(
+            codec.decode_many(codec.encode_many(values)),
+            [(value,) for value in values])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_encode_many_array(self):
+        for kwargs in ({}, {'min_length': 0}, {'min_length': 64},
+                       {'alphabet': '0123456789ABCDEF'}):
+            codec = self.makeOne(**kwargs)
+            values = self.sample(bits=64)
+            for dtype in (numpy.uint64, numpy.int64):
+                array = numpy.array(values, dtype=numpy.uint64).astype(dtype)
+                self.assertEqual(
+                    codec.encode_many(array),
+                    [codec.encode(v) for v in array.tolist()])
+        self.assertEqual(codec.encode_many(numpy.array([], numpy.uint64)), [])
+
+    def test_encode_into(self):
+        for kwargs in ({}, {'min_length': 0}, {'min_length': 64},
+                       {'alphabet': '0123456789ABCDEF'}):
+            codec = self.makeOne(**kwargs)
+            buf = bytearray(256)
+            for value in self.sample(100, bits=64):
+                hashid = codec.encode(value).encode()
+                for target in (buf, memoryview(buf)):
+                    self.assertEqual(
+                        codec.encode_into(target, 7, value), len(hashid))
+                    self.assertEqual(bytes(buf[7:7 + len(hashid)]), hashid)
+        self.assertEqual(codec.encode_into(buf, 0, -1), 0)
+
+    def test_encode_into_too_small(self):
+        codec = self.makeOne()
+        fallback = self.makeOne(alphabet='abcdefghijklmnopqrstuvwxyzé')
+        for codec in (codec, fallback):
+            for buf in (bytearray(10), memoryview(bytearray(10))):
+                with self.assertRaises(ValueError):
+                    codec.encode_into(buf, 0, 1762352222709391612)
+                self.assertEqual(len(buf), 10)
+                self.assertEqual(bytes(buf), bytes(10))
+            buf = bytearray(40)
+            with self.assertRaises(ValueError):
+                codec.encode_into(buf, 20, 1762352222709391612)
+            with self.assertRaises(ValueError):
+                codec.encode_into(buf, -1, 1762352222709391612)
+            self.assertEqual(bytes(buf), bytes(40))
+
+    def test_decode_from(self):
+        for kwargs in ({}, {'min_length': 0}, {'min_length': 64},
+                       {'alphabet': '0123456789ABCDEF'}):
+            codec = self.makeOne(**kwargs)
+            for value in self.sample(100, bits=64):
+                hashid = codec.encode(value).encode()
+                for buf in (hashid, bytearray(b'xx' + hashid),
+                            memoryview(b'x' + hashid + b'x')[1:]):
+                    offset = 2 if isinstance(buf, bytearray) else 0
+                    self.assertEqual(
+                        codec.decode_from(buf, offset, len(hashid)), (value,))
+
+    def test_decode_from_invalid(self):
+        codec = self.makeOne()
+        hashid = codec.encode(1762352222709391612)
+        for value in ('x' * 32, '_' * 32, hashid[:-1] + '_', hashid[::-1],
+                      hashid[1:] + 'a', hashid.swapcase(),
+                      codec.encode(1, 2)[:32]):
+            self.assertEqual(codec.decode_from(value.encode()), ())
+        self.assertEqual(codec.decode_from(hashid.encode(), 1), ())
+        self.assertEqual(codec.decode_from(hashid[:-1].encode()), ())
+
+    def test_packed(self):
+        codec = self.makeOne()
+        values = self.sample()
+        packed = codec.encode_packed(values)
+        self.assertEqual(bytes(packed), ''.join(
+            codec.encode(value) for value in values).encode())
+        self.assertEqual(codec.decode_packed(packed),
+                         [(value,) for value in values])
+        self.assertEqual(codec.decode_packed(memoryview(packed)[32:64]),
+                         [(values[1],)])
+        with self.assertRaises(ValueError):
+            codec.decode_packed(packed[:-1])
+        with self.assertRaises(ValueError):
+            codec.encode_packed([2 ** 200])
+
+
+class TestCodecCache(unittest.TestCase):
+    def makeOne(self, maxsize=2):
+        return CodecCache(maxsize)
+
+    def test_hit_miss(self):
+        cache = self.makeOne()
+        codec = cache.get('sdfs', 32)
+        self.assertIsInstance(codec, HashIDCodec)
+        self.assertIs(cache.get('sdfs', 32), codec)
+        self.assertIsNot(cache.get('other', 32), codec)
+        self.assertEqual(cache.cache_info(), CacheInfo(1, 2, 2, 2))
+        self.assertEqual(codec.encode(1762352222709391612),
+                         'bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3')
+
+    def test_lru_eviction(self):
+        cache = self.makeOne()
+        first = cache.get('a', 32)
+        cache.get('b', 32)
+        cache.get('a', 32)
+        cache.get('c', 32)
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get('a', 32), first)
+        self.assertEqual(cache.cache_info().misses, 3)
+        cache.get('b', 32)
+        self.assertEqual(cache.cache_info().misses, 4)
+
+    def test_resize_clear(self):
+        cache = self.makeOne(None)
+        for salt in 'abcd':
+            cache.get(salt, 32)
+        self.assertEqual(len(cache), 4)
+        cache.resize(1)
+        self.assertEqual(cache.cache_info(), CacheInfo(0, 4, 1, 1))
+        cache.clear()
+        self.assertEqual(cache.cache_info(), CacheInfo(0, 0, 1, 0))
+
+    def test_disabled(self):
+        cache = self.makeOne(0)
+        self.assertIsNot(cache.get('a', 32), cache.get('a', 32))
+        self.assertEqual(len(cache), 0)
+
+    def test_threads(self):
+        cache = self.makeOne()
+        seen = []
+        threads = [threading.Thread(
+            target=lambda: seen.append(cache.get('a', 32).encode(12345)))
+            for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(seen)), 1)
+        self.assertEqual(len(cache), 1)
+        info = cache.cache_info()
+        self.assertEqual(info.hits + info.misses, 8)
+
+    def test_generators_share_codec(self):
+        self.assertIs(HashIDGenerator(salt='tenant')._gen,
+                      HashIDGenerator(salt='tenant')._gen)
+        self.assertIs(HashIDGenerator(salt='tenant')._gen,
+                      get_codec('tenant', 32, HashIDGenerator().alphabet))
+        self.assertIsNot(HashIDGenerator(salt='other')._gen,
+                         HashIDGenerator(salt='tenant')._gen)
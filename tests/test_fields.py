@@ -1,4 +1,6 @@
+import pickle
 import unittest
+from unittest import mock
 
 import attr
 from zope.interface import Interface, implementer
@@ -8,6 +10,8 @@ import hashidtools
 from hashidtools.interfaces import IHashIDGenerator, IHashID
 from hashidtools import HashIDGenerator, HashID
 from hashidtools import fields
+from hashidtools.fields import HashIDValidator
+from hashidtools.exceptions import InvalidHashID
 
 
 class IFoo(Interface):
@@ -25,6 +29,13 @@ class Foo2:
     id: HashID = fields.hashid()
 
 
+@attr.s
+class LazyFoo:
+    _id = fields.lazy_hashid()
+    id = fields.LazyHashIDAttribute()
+    name = attr.ib(default=None)
+
+
 class TestHashID(unittest.TestCase):
     def makeFoo(self, *args, **kwargs):
         return Foo(*args, **kwargs)
@@ -55,3 +66,121 @@ class TestHashID(unittest.TestCase):
     #
     #         errors = zope.schema.getValidationErrors(IFoo, foo)
     #         self.assertEqual(errors, [])
+
+
+class TestHashIDValidator(unittest.TestCase):
+    hashid = 'bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3'
+
+    def makeOne(self, decode=False):
+        return HashIDValidator.from_generator(
+            HashIDGenerator(salt='sdfs'), decode)
+
+    def test_valid(self):
+        validator = self.makeOne()
+        self.assertTrue(validator(self.hashid))
+        self.assertTrue(validator('x' * 32))
+
+    def test_invalid(self):
+        validator = self.makeOne()
+        for value in (self.hashid[:-1], self.hashid + 'a', '_' * 32,
+                      '\u00e9' * 32, self.hashid[:-1] + '\n', None,
+                      self.hashid.encode(), 1):
+            self.assertFalse(validator(value), value)
+
+    def test_decode(self):
+        validator = self.makeOne(decode=True)
+        self.assertTrue(validator(self.hashid))
+        self.assertFalse(validator('x' * 32))
+
+    def test_custom_alphabet(self):
+        validator = HashIDValidator('0123456789abcdef-]^\\', 4)
+        self.assertTrue(validator('0a-]'))
+        self.assertTrue(validator('^\\00'))
+        self.assertFalse(validator('0aG0'))
+
+    def test_validate_many(self):
+        validator = self.makeOne()
+        self.assertEqual(
+            validator.validate_many([self.hashid, '_', 'x' * 32]),
+            [True, False, True])
+
+
+class TestHashIDField(unittest.TestCase):
+    def makeOne(self, **kwargs):
+        return fields.HashID(**kwargs)
+
+    def test_validate(self):
+        field = self.makeOne()
+        field.validate(HashIDGenerator().new())
+        with self.assertRaises(InvalidHashID):
+            field.validate('_' * 32)
+        with self.assertRaises(InvalidHashID):
+            field.validate('a' * 31)
+
+    def test_validate_decode(self):
+        field = self.makeOne(decode=True)
+        field.validate(HashIDGenerator().new())
+        with self.assertRaises(InvalidHashID):
+            field.validate('a' * 32)
+
+    def test_validate_many(self):
+        field = self.makeOne()
+        hashids = HashIDGenerator().new_many(10)
+        field.validate_many(hashids)
+        with self.assertRaises(InvalidHashID):
+            field.validate_many(hashids + ['_' * 32])
+        with self.assertRaises(zope.schema.ValidationError):
+            field.validate_many(hashids + [None])
+
+    def test_from_unicode(self):
+        field = self.makeOne()
+        hashid = HashIDGenerator().new()
+        self.assertEqual(field.fromUnicode(' {} '.format(hashid)), hashid)
+        self.assertEqual(field.fromUnicode(hashid.encode()), hashid)
+        with self.assertRaises(InvalidHashID):
+            field.fromUnicode('_' * 32)
+
+    def test_default(self):
+        field = self.makeOne()
+        self.assertRegex(field.default, r'^\w{32}$')
+
+
+class TestLazyHashID(unittest.TestCase):
+    def test_generated_on_first_read(self):
+        with mock.patch('hashidtools.fields.get_generator') as query:
+            foo = LazyFoo()
+        query.assert_not_called()
+        self.assertIs(foo._id, fields.LAZY)
+        self.assertEqual(repr(foo), 'LazyFoo(_id=<lazy>, name=None)')
+
+        hashid = foo.id
+        self.assertRegex(hashid, r'^\w{32}$')
+        self.assertEqual(foo.id, hashid)
+        self.assertEqual(foo._id, hashid)
+
+    def test_provided(self):
+        hashid = HashIDGenerator().new()
+        foo = LazyFoo(hashid)
+        self.assertEqual(foo.id, hashid)
+        with self.assertRaises(TypeError):
+            LazyFoo(1)
+
+    def test_assignment(self):
+        foo = LazyFoo()
+        foo.id = None
+        self.assertIsNone(foo.id)
+        foo.id = 'new'
+        self.assertEqual(foo._id, 'new')
+
+    def test_not_compared(self):
+        self.assertEqual(LazyFoo(name='a'), LazyFoo(name='a'))
+        self.assertNotEqual(LazyFoo(name='a'), LazyFoo(name='b'))
+
+    def test_pickle_unread(self):
+        foo = pickle.loads(pickle.dumps(LazyFoo()))
+        self.assertIs(foo._id, fields.LAZY)
+        self.assertRegex(foo.id, r'^\w{32}$')
+
+    def test_class_access(self):
+        self.assertIsInstance(LazyFoo.id, fields.LazyHashIDAttribute)
+        self.assertEqual(LazyFoo.id.storage, '_id')
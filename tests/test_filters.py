@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from hashidtools import HashIDGenerator
+from hashidtools.filters import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    def makeOne(self, capacity=1000, error_rate=0.01):
+        return BloomFilter(capacity=capacity, error_rate=error_rate)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.makeOne(capacity=0)
+        with self.assertRaises(ValueError):
+            self.makeOne(error_rate=1)
+
+    def test_no_false_negatives(self):
+        bloom = self.makeOne()
+        gen = HashIDGenerator()
+        hashids = gen.new_many(1000)
+        seeds = [random.getrandbits(63) for _ in range(1000)]
+        bloom.update(hashids)
+        bloom.update(seeds)
+        self.assertEqual(len(bloom), 2000)
+        self.assertTrue(all(hashid in bloom for hashid in hashids))
+        self.assertTrue(all(seed in bloom for seed in seeds))
+
+    def test_false_positive_rate(self):
+        bloom = self.makeOne()
+        gen = HashIDGenerator()
+        bloom.update(gen.new_many(1000))
+        positives = sum(hashid in bloom for hashid in gen.new_many(10000))
+        self.assertLess(positives, 300)
+
+    def test_stale(self):
+        bloom = self.makeOne(capacity=100)
+        bloom.update(range(100))
+        self.assertFalse(bloom.stale)
+        bloom.add(100)
+        self.assertTrue(bloom.stale)
+
+        bloom = self.makeOne(capacity=1000)
+        bloom.update(range(1000))
+        for key in range(100):
+            bloom.discard(key)
+        self.assertFalse(bloom.stale)
+        bloom.discard(100)
+        self.assertTrue(bloom.stale)
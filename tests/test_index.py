@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import attr
+
+from hashidtools import (
+    HashIDGenerator, HashIDManager, ShardedHashIDManager, fields, index)
+from hashidtools.types import shard_of
+
+
+@attr.s
+class Fixture:
+    id: str = fields.hashid()
+
+
+class TestIDIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ids.idx')
+        self.gen = HashIDGenerator()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def register(self, intid, count=100):
+        return intid.register_many([Fixture() for _ in range(count)])
+
+    def test_export(self):
+        intid = HashIDManager()
+        uids = self.register(intid)
+        self.assertEqual(index.export_index(intid, self.path), 100)
+        self.assertEqual(os.path.getsize(self.path), 16 + 8 * 100)
+
+        with index.IDIndex(self.path) as ids:
+            keys = sorted(self.gen.decode(uid) for uid in uids)
+            self.assertEqual(len(ids), 100)
+            self.assertEqual(list(ids), keys)
+            for uid in uids:
+                self.assertIn(uid, ids)
+                self.assertEqual(ids.to_int(uid), self.gen.decode(uid))
+                self.assertEqual(ids.rank(uid), keys.index(ids.to_int(uid)))
+            self.assertIn(keys[0], ids)
+            self.assertNotIn(self.gen.new(), ids)
+            self.assertNotIn('invalid', ids)
+            with self.assertRaises(KeyError):
+                ids.to_int(self.gen.new())
+
+    def test_export_int_keys(self):
+        intid = ShardedHashIDManager(int_keys=True, shards=4)
+        uids = self.register(intid)
+        index.export_index(intid, self.path)
+        with index.IDIndex(self.path) as ids:
+            self.assertEqual(list(ids), list(intid.refs.keys()))
+            for uid in uids:
+                shard = ids.shard(uid, 4)
+                self.assertEqual(shard, shard_of(self.gen.decode(uid), 4))
+                self.assertIn(self.gen.decode(uid),
+                              intid.refs.shards[shard])
+
+    def test_contains_many(self):
+        intid = HashIDManager()
+        uids = self.register(intid, 10)
+        index.export_index(intid, self.path)
+        keys = uids + [self.gen.new(), 'invalid', 2 ** 63 - 1]
+        expected = [True] * 10 + [False] * 3
+        with index.IDIndex(self.path) as ids:
+            self.assertEqual(ids.contains_many(keys), expected)
+            with mock.patch('hashidtools.index.get_numpy', return_value=None):
+                self.assertEqual(ids.contains_many(keys), expected)
+
+    def test_empty(self):
+        index.export_index(HashIDManager(), self.path)
+        with index.IDIndex(self.path) as ids:
+            self.assertEqual(len(ids), 0)
+            self.assertNotIn(self.gen.new(), ids)
+            self.assertEqual(ids.contains_many([self.gen.new()]), [False])
+
+    def test_update(self):
+        intid = HashIDManager()
+        uids = self.register(intid, 10)
+        index.export_index(intid, self.path)
+        ids = index.IDIndex(self.path)
+        self.assertFalse(ids.refresh())
+
+        added = self.gen.new_many(5)
+        count = index.update_index(
+            self.path, added=added + uids[:1], removed=uids[:3])
+        self.assertEqual(count, 12)
+        self.assertEqual(len(ids), 10)
+        self.assertTrue(ids.refresh())
+        self.assertEqual(len(ids), 12)
+        self.assertEqual(list(ids), sorted(ids))
+        self.assertTrue(all(uid in ids for uid in added + uids[3:]))
+        self.assertFalse(any(uid in ids for uid in uids[:3]))
+        ids.close()
+        self.assertEqual(os.listdir(self.directory), ['ids.idx'])
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as fd:
+            fd.write(b'\0' * 16)
+        with self.assertRaises(ValueError):
+            index.IDIndex(self.path)
@@ -0,0 +1,76 @@
+import unittest
+
+from zope import component
+from zope.interface import Interface, implementer
+from zope.interface.registry import Components
+import attr
+
+import hashidtools
+from hashidtools import HashIDGenerator, fields
+from hashidtools.interfaces import IHashIDGenerator
+from hashidtools.lookup import CachedUtility, get_generator
+
+
+class IThing(Interface):
+    pass
+
+
+@implementer(IThing)
+class Thing:
+    pass
+
+
+class TestCachedUtility(unittest.TestCase):
+    def setUp(self):
+        self.registry = component.getGlobalSiteManager()
+        self.addCleanup(
+            self.registry.unregisterUtility, provided=IThing)
+
+    def makeOne(self, interface=IThing):
+        return CachedUtility(interface)
+
+    def test_query(self):
+        lookup = self.makeOne()
+        self.assertIsNone(lookup())
+        self.assertEqual(lookup(default='default'), 'default')
+
+        thing = Thing()
+        self.registry.registerUtility(thing, IThing)
+        self.assertIs(lookup(), thing)
+        self.assertIs(lookup(), thing)
+
+    def test_invalidated_on_registration(self):
+        lookup = self.makeOne()
+        first, second = Thing(), Thing()
+        component.provideUtility(first, IThing)
+        self.assertIs(lookup(), first)
+        component.provideUtility(second, IThing)
+        self.assertIs(lookup(), second)
+        self.registry.unregisterUtility(second, IThing)
+        self.assertIsNone(lookup())
+
+    def test_context_site_manager(self):
+        lookup = self.makeOne()
+        thing = Thing()
+        local = Components('local', bases=(self.registry,))
+        local.registerUtility(thing, IThing)
+        self.assertIs(lookup(local), thing)
+        self.assertIsNone(lookup())
+
+
+class TestGetGenerator(unittest.TestCase):
+    def test_generator(self):
+        self.assertIs(
+            get_generator(), component.queryUtility(IHashIDGenerator))
+
+    def test_override(self):
+        registry = component.getGlobalSiteManager()
+        default = get_generator()
+        gen = HashIDGenerator(salt='tenant')
+        registry.registerUtility(gen, IHashIDGenerator)
+        self.addCleanup(registry.registerUtility, default, IHashIDGenerator)
+
+        self.assertIs(get_generator(), gen)
+        hashid = attr.make_class('Foo', {'id': fields.hashid()})().id
+        self.assertEqual(gen.encode(gen.decode(hashid)), hashid)
+        self.assertEqual(int(hashidtools.HashID(hashid)), gen.decode(hashid))
@@ -0,0 +1,118 @@
+import unittest
+from unittest import mock
+
+from zope import component
+from zc.intid.interfaces import IntIdInUseError
+import attr
+
+from hashidtools import HashIDGenerator, HashIDManager, fields, metrics
+from hashidtools.interfaces import IHashIDMetrics
+from hashidtools.metrics import MemoryMetrics
+
+
+@attr.s
+class Fixture:
+    id: str = fields.hashid()
+
+
+class TestMemoryMetrics(unittest.TestCase):
+    def test_interface(self):
+        self.assertTrue(IHashIDMetrics.providedBy(MemoryMetrics()))
+
+    def test_snapshot(self):
+        sink = MemoryMetrics(buckets=(0.001, 0.01))
+        sink.increment('hits')
+        sink.increment('hits', 2)
+        for seconds in (0.0005, 0.005, 0.005, 5):
+            sink.observe('latency', seconds)
+
+        snapshot = sink.snapshot()
+        self.assertEqual(snapshot['counters'], {'hits': 3})
+        histogram = snapshot['histograms']['latency']
+        self.assertEqual(histogram['count'], 4)
+        self.assertAlmostEqual(histogram['sum'], 5.0105)
+        self.assertEqual(histogram['buckets'],
+                         [[0.001, 1], [0.01, 2], [float('inf'), 1]])
+
+        sink.increment('hits')
+        self.assertEqual(snapshot['counters'], {'hits': 3})
+        sink.reset()
+        self.assertEqual(sink.snapshot(), {'counters': {}, 'histograms': {}})
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.registry = component.getGlobalSiteManager()
+        self.sink = MemoryMetrics()
+
+    def enable(self):
+        self.registry.registerUtility(self.sink, IHashIDMetrics)
+        self.addCleanup(self.registry.unregisterUtility, self.sink,
+                        IHashIDMetrics)
+
+    def counts(self):
+        snapshot = self.sink.snapshot()
+        counts = {name: histogram['count'] for name, histogram
+                  in snapshot['histograms'].items()}
+        counts.update(snapshot['counters'])
+        return counts
+
+    def test_disabled(self):
+        self.assertEqual(metrics._active, 0)
+        with mock.patch('hashidtools.metrics.get_metrics') as lookup:
+            HashIDGenerator().new()
+            HashIDManager().register(Fixture())
+        lookup.assert_not_called()
+
+    def test_registration(self):
+        self.enable()
+        self.assertEqual(metrics._active, 1)
+        self.registry.unregisterUtility(self.sink, IHashIDMetrics)
+        self.assertEqual(metrics._active, 0)
+        HashIDGenerator().new()
+        self.assertEqual(self.counts(), {})
+
+    def test_generator(self):
+        self.enable()
+        gen = HashIDGenerator()
+        hashid = gen.new()
+        gen.decode(hashid)
+        with self.assertRaises(IndexError):
+            gen.decode('invalid')
+
+        self.assertEqual(self.counts(), {
+            'generator.new': 1,
+            'generator.encode': 1,
+            'generator.decode': 2,
+            'generator.decode.errors': 1,
+        })
+
+    def test_manager(self):
+        intid = HashIDManager(collision_filter=True, max_retries=1)
+        objs = [Fixture() for _ in range(3)]
+        self.enable()
+        uid = intid.register(objs[0])
+        intid.register_many(objs[1:])
+        intid.getObject(uid)
+        intid.unregister(objs[0])
+        intid.unregister_many(objs[1:])
+
+        counts = self.counts()
+        for name in ('register', 'register_many', 'getObject',
+                     'unregister', 'unregister_many'):
+            self.assertEqual(counts.pop('manager.' + name), 1)
+        self.assertEqual(counts.pop('manager.notify'), 6)
+        self.assertEqual(counts.pop('manager.added'), 3)
+        self.assertEqual(counts.pop('manager.removed'), 3)
+        self.assertTrue(all(name.startswith('generator.') for name in counts))
+
+    def test_collisions(self):
+        intid = HashIDManager(collision_filter=True, max_retries=1)
+        obj = Fixture()
+        intid.register(obj)
+        self.enable()
+        with mock.patch('hashidtools.types.get_generator') as lookup:
+            lookup.return_value = lambda: obj.id
+            with self.assertRaises(IntIdInUseError):
+                intid.generateId()
+        self.assertEqual(self.counts()['manager.collisions'], 2)
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from zope import component
+from zope.intid.interfaces import IIntIds as IZopeIntIds
+from zc.intid.interfaces import IIntIds
+
+import hashidtools
+from hashidtools import registration
+from hashidtools.interfaces import IHashIDGenerator
+
+
+class TestConfigure(unittest.TestCase):
+    def test_configured_on_import(self):
+        self.assertIsInstance(
+            component.queryUtility(IHashIDGenerator),
+            hashidtools.HashIDGenerator)
+        self.assertIsInstance(
+            component.queryUtility(IIntIds), hashidtools.HashIDManager)
+        self.assertTrue(
+            IZopeIntIds.providedBy(component.queryUtility(IIntIds)))
+
+    def test_import_skips_zcml(self):
+        code = ('import sys, hashidtools; '
+                'print("zope.configuration" in sys.modules)')
+        output = subprocess.check_output(
+            [sys.executable, '-c', code], universal_newlines=True,
+            cwd=os.path.dirname(os.path.dirname(hashidtools.__file__)))
+        self.assertEqual(output.strip(), 'False')
+
+    def test_configure_once(self):
+        with mock.patch.object(registration, 'provideUtility') as provide:
+            registration.configure()
+        provide.assert_not_called()
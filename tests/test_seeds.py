@@ -0,0 +1,152 @@
+import os
+import unittest
+from unittest import mock
+
+from hashidtools import HashIDGenerator
+from hashidtools.interfaces import ISeedSource
+from hashidtools.seeds import (
+    UrandomSeeds, RandomSeeds, TimeOrderedSeeds, urandom_seeds)
+
+
+class TestUrandomSeeds(unittest.TestCase):
+    def makeOne(self, block_size=4096):
+        return UrandomSeeds(block_size=block_size)
+
+    def test_interface(self):
+        self.assertTrue(ISeedSource.providedBy(self.makeOne()))
+
+    def test_seed(self):
+        seeds = self.makeOne()
+        values = [seeds() for _ in range(1000)]
+        self.assertEqual(len(set(values)), 1000)
+        self.assertTrue(all(0 <= value < 2 ** 63 for value in values))
+
+    def test_many(self):
+        seeds = self.makeOne()
+        values = [int(value) for value in seeds.many(1000)]
+        self.assertEqual(len(values), 1000)
+        self.assertEqual(len(set(values)), 1000)
+        self.assertTrue(all(0 <= value < 2 ** 63 for value in values))
+
+    def test_many_without_numpy(self):
+        seeds = self.makeOne()
+        with mock.patch('hashidtools.seeds.get_numpy', return_value=None):
+            values = seeds.many(10)
+        self.assertIsInstance(values, list)
+        self.assertTrue(all(0 <= value < 2 ** 63 for value in values))
+
+    def test_buffered(self):
+        seeds = self.makeOne(block_size=64)
+        with mock.patch('os.urandom', wraps=os.urandom) as urandom:
+            for _ in range(16):
+                seeds()
+        self.assertEqual(urandom.call_count, 2)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+    def test_fork(self):
+        seeds = self.makeOne()
+        seeds()
+        read, write = os.pipe()
+        pid = os.fork()
+        if not pid:
+            os.write(write, seeds().to_bytes(8, 'little'))
+            os._exit(0)
+        os.waitpid(pid, 0)
+        child = int.from_bytes(os.read(read, 8), 'little')
+        os.close(read)
+        os.close(write)
+        self.assertNotEqual(child, seeds())
+
+    def test_reset_replaces_lock(self):
+        seeds = self.makeOne()
+        seeds._lock.acquire()
+        seeds._pid = -1
+        self.assertEqual(len(seeds.read(8)), 8)
+
+
+class TestRandomSeeds(unittest.TestCase):
+    def test_seeds(self):
+        seeds = RandomSeeds()
+        self.assertTrue(ISeedSource.providedBy(seeds))
+        self.assertLess(seeds(), 2 ** 63)
+        self.assertEqual(len(seeds.many(10)), 10)
+
+
+class TestGeneratorSeeds(unittest.TestCase):
+    def test_default(self):
+        self.assertIs(HashIDGenerator().seeds, urandom_seeds)
+
+    def test_pluggable(self):
+        seeds = mock.Mock(return_value=1762352222709391612)
+        seeds.many.return_value = [1762352222709391612]
+        gen = HashIDGenerator(salt='sdfs', seeds=seeds)
+        self.assertEqual(gen.new(), 'bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3')
+        self.assertEqual(gen.new_many(1), ['bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3'])
+        self.assertEqual(gen, HashIDGenerator(salt='sdfs'))
+
+
+class TestTimeOrderedSeeds(unittest.TestCase):
+    def makeOne(self, **kwargs):
+        return TimeOrderedSeeds(**kwargs)
+
+    def test_interface(self):
+        self.assertTrue(ISeedSource.providedBy(self.makeOne()))
+
+    def test_ordered(self):
+        seeds = self.makeOne()
+        with mock.patch('time.time', return_value=1539792000.0):
+            first = [seeds() for _ in range(100)]
+        with mock.patch('time.time', return_value=1539792000.001):
+            second = [int(seed) for seed in seeds.many(100)]
+        self.assertLess(max(first), min(second))
+        self.assertTrue(all(0 <= seed < 2 ** 63 for seed in first + second))
+        self.assertEqual(seeds.timestamp(first[0]), 1539792000.0)
+        self.assertEqual(seeds.timestamp(second[0]), 1539792000.001)
+
+    def test_counter(self):
+        seeds = self.makeOne(counter=True)
+        with mock.patch('time.time', return_value=1539792000.0):
+            values = [seeds() for _ in range(10)]
+            values.extend(int(seed) for seed in seeds.many(10))
+            with mock.patch('hashidtools.seeds.get_numpy', return_value=None):
+                values.extend(seeds.many(10))
+        self.assertEqual(values, list(range(values[0], values[0] + 30)))
+        self.assertEqual(seeds.timestamp(values[-1]), 1539792000.0)
+
+    def test_many_unique(self):
+        seeds = self.makeOne()
+        with mock.patch('time.time', return_value=1539792000.0):
+            values = [int(seed) for _ in range(3)
+                      for seed in seeds.many(10000)]
+        self.assertEqual(len(set(values)), 30000)
+        gen = HashIDGenerator(seeds=self.makeOne())
+        self.assertEqual(len(set(gen.new_many(10000))), 10000)
+
+    def test_reset_replaces_lock(self):
+        seeds = self.makeOne(counter=True)
+        seeds._lock.acquire()
+        seeds.reset()
+        self.assertLess(seeds(), 2 ** 63)
+
+    def test_counter_carries(self):
+        seeds = self.makeOne(random_bits=2, counter=True)
+        with mock.patch('time.time', return_value=1539792000.0):
+            values = [seeds() for _ in range(10)]
+        self.assertEqual(values, sorted(set(values)))
+
+    def test_shard(self):
+        seeds = self.makeOne(random_bits=18, shard=3, shard_bits=4)
+        with mock.patch('time.time', return_value=1539792000.0):
+            seed = seeds()
+        self.assertEqual(seed >> 59, 3)
+        self.assertEqual(seeds.timestamp(seed), 1539792000.0)
+        with self.assertRaises(ValueError):
+            self.makeOne(shard=16, shard_bits=4)
+        with self.assertRaises(ValueError):
+            self.makeOne(random_bits=40, shard_bits=30)
+
+    def test_generator(self):
+        gen = HashIDGenerator(salt='sdfs', seeds=self.makeOne(counter=True))
+        hashids = gen.new_many(10) + [gen.new()]
+        values = [gen.decode(hashid) for hashid in hashids]
+        self.assertEqual(values, sorted(values))
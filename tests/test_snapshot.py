@@ -0,0 +1,125 @@
+import io
+import unittest
+from unittest import mock
+
+import attr
+import persistent
+import zope.event
+
+from hashidtools import HashIDManager, ShardedHashIDManager, fields, snapshot
+
+try:
+    import ZODB
+    import transaction
+except ImportError:
+    ZODB = None
+
+
+@attr.s
+class Fixture:
+    id: str = fields.hashid()
+
+
+class Item(persistent.Persistent):
+    def __init__(self):
+        self.id = fields._new_hashid()
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.objects = {}
+
+    def reference(self, obj):
+        ref = len(self.objects).to_bytes(8, 'little')
+        self.objects[ref] = obj
+        return ref
+
+    def dump(self, intid):
+        fd = io.BytesIO()
+        snapshot.dump(intid, fd, self.reference)
+        fd.seek(0)
+        return fd
+
+    def assertRoundTrip(self, source, target):
+        insts = [Fixture() for _ in range(50)]
+        uids = source.register_many(insts)
+        fd = self.dump(source)
+        self.assertEqual(len(fd.getvalue()), 16 + 16 * 50 + 4)
+
+        events = []
+        zope.event.subscribers.append(events.append)
+        try:
+            self.assertEqual(snapshot.load(target, fd, self.objects.get), 50)
+        finally:
+            zope.event.subscribers.remove(events.append)
+        self.assertEqual(events, [])
+        self.assertEqual(sorted(target.iter_ids()), sorted(uids))
+        for uid, inst in zip(uids, insts):
+            self.assertIs(target.getObject(uid), inst)
+
+    def test_round_trip(self):
+        self.assertRoundTrip(HashIDManager(), HashIDManager())
+
+    def test_int_keys(self):
+        self.assertRoundTrip(
+            HashIDManager(int_keys=True), HashIDManager(int_keys=True))
+
+    def test_convert_key_mode(self):
+        self.assertRoundTrip(HashIDManager(), HashIDManager(int_keys=True))
+        self.assertRoundTrip(
+            HashIDManager(int_keys=True), ShardedHashIDManager(shards=4))
+
+    def test_chunks(self):
+        with mock.patch('hashidtools.snapshot.CHUNK_SIZE', 7):
+            self.assertRoundTrip(HashIDManager(), HashIDManager())
+
+    def test_replaces_refs(self):
+        target = HashIDManager(collision_filter=True)
+        old = Fixture()
+        target.register(old)
+        self.assertRoundTrip(HashIDManager(), target)
+        self.assertIsNone(target.queryObject(old.id))
+
+    def test_corrupt(self):
+        intid = HashIDManager()
+        intid.register_many([Fixture() for _ in range(3)])
+        data = bytearray(self.dump(intid).getvalue())
+        target = HashIDManager()
+        target.register(Fixture())
+
+        corrupt = bytearray(data)
+        corrupt[20] ^= 1
+        with self.assertRaises(ValueError):
+            snapshot.load(target, io.BytesIO(corrupt), self.objects.get)
+        with self.assertRaises(ValueError):
+            snapshot.load(target, io.BytesIO(data[:-6]), self.objects.get)
+        with self.assertRaises(ValueError):
+            snapshot.load(target, io.BytesIO(b'x' * 40), self.objects.get)
+        self.assertEqual(len(target), 1)
+
+    def test_reference(self):
+        intid = HashIDManager()
+        intid.register(Fixture())
+        with self.assertRaises(ValueError):
+            snapshot.dump(intid, io.BytesIO())
+        with self.assertRaises(ValueError):
+            snapshot.dump(intid, io.BytesIO(), lambda obj: b'short')
+
+    @unittest.skipIf(ZODB is None, 'requires ZODB')
+    def test_oids(self):
+        db = ZODB.DB(None)
+        self.addCleanup(db.close)
+        conn = db.open()
+        intid = conn.root.intid = HashIDManager()
+        items = [Item() for _ in range(10)]
+        intid.register_many(items)
+        transaction.commit()
+
+        fd = io.BytesIO()
+        snapshot.dump(intid, fd)
+        fd.seek(0)
+        restored = conn.root.restored = HashIDManager()
+        snapshot.load(restored, fd, conn.get)
+        transaction.commit()
+        for item in items:
+            self.assertIs(restored.getObject(item.id), item)
@@ -1,15 +1,38 @@
+import gc
+import pickle
+import threading
 import unittest
+from unittest import mock
 
 import attr
+import persistent
 from zope import component
 import zope.schema
 from zc.intid.interfaces import IIntIds, AddedEvent, RemovedEvent
+from zope.intid.interfaces import ObjectMissingError, IntIdMissingError
+from zc.intid.interfaces import IntIdInUseError
 import zope.event.classhandler
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import ZODB
+    import transaction
+except ImportError:
+    ZODB = None
+
 import hashidtools
 from hashidtools import fields
+from hashidtools.events import IdsAddedEvent, IdsRemovedEvent
+from hashidtools.exceptions import IDRegisterError
+from hashidtools.filters import BloomFilter
 from hashidtools.interfaces import IHashIDGenerator, IHashID
-from hashidtools.types import HashIDGenerator, HashID, HashIDManager
+from hashidtools.types import (
+    HashIDGenerator, PooledHashIDGenerator, HashID, LazyHashID, CompactHashID,
+    HashIDManager, ShardedHashIDManager, ShardedBTree)
 
 
 class TestHashIDGenerator(unittest.TestCase):
@@ -25,6 +48,24 @@ class TestHashIDGenerator(unittest.TestCase):
         errors = zope.schema.getSchemaValidationErrors(IHashIDGenerator, gen)
         self.assertEqual(errors, [])
 
+    def test_buffers(self):
+        gen = self.makeOne()
+        seed = 1762352222709391612
+        buf = bytearray(40)
+        self.assertEqual(gen.encode_into(buf, 4, seed), 32)
+        self.assertEqual(bytes(buf[4:36]), b'bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3')
+        self.assertEqual(gen.decode_from(buf, 4), seed)
+        with self.assertRaises(IndexError):
+            gen.decode_from(buf)
+
+        seeds = [gen.seed() for _ in range(10)]
+        packed = gen.encode_packed(seeds)
+        self.assertEqual(len(packed), 320)
+        self.assertEqual(gen.decode_packed(packed), seeds)
+        packed[0:1] = b'_'
+        with self.assertRaises(IndexError):
+            gen.decode_packed(packed)
+
     def test_hashid_generator_basic(self):
         salt = 'sdfs'
         min_length = 34
@@ -56,6 +97,31 @@ class TestHashIDGenerator(unittest.TestCase):
         self.assertRegex(hashid, r'^\w{32}$')
         self.assertIsInstance(hashid, str)
 
+    def test_hashid_generator_new_many(self):
+        gen = self.makeOne()
+        hashids = gen.new_many(100)
+        self.assertEqual(len(hashids), 100)
+        self.assertEqual(len(set(hashids)), 100)
+        for hashid in hashids:
+            self.assertRegex(hashid, r'^\w{32}$')
+
+    def test_hashid_generator_encode_decode_many(self):
+        gen = self.makeOne()
+        seeds = [gen.seed() for _ in range(100)]
+        hashids = gen.encode_many(seeds)
+        self.assertEqual(hashids, [gen.encode(seed) for seed in seeds])
+        self.assertEqual(gen.decode_many(iter(hashids)), seeds)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_hashid_generator_encode_decode_many_array(self):
+        gen = self.makeOne()
+        seeds = numpy.array([gen.seed() for _ in range(100)], numpy.uint64)
+        hashids = gen.encode_many(seeds)
+        self.assertEqual(hashids, [gen.encode(int(seed)) for seed in seeds])
+        decoded = gen.decode_many(numpy.array(hashids))
+        self.assertEqual(decoded.dtype, numpy.uint64)
+        self.assertTrue((decoded == seeds).all())
+
     def test_immutable_attributes(self):
         from attr.exceptions import FrozenInstanceError
 
@@ -71,6 +137,93 @@ class TestHashIDGenerator(unittest.TestCase):
 
 
 
+class TestPooledHashIDGenerator(unittest.TestCase):
+    def makeOne(self, low_watermark=10, high_watermark=100, background=False):
+        return PooledHashIDGenerator(
+            salt='sdfs', low_watermark=low_watermark,
+            high_watermark=high_watermark, background=background)
+
+    def test_interface(self):
+        gen = self.makeOne()
+        self.assertTrue(IHashIDGenerator.providedBy(gen))
+
+    def test_watermarks(self):
+        with self.assertRaises(ValueError):
+            self.makeOne(low_watermark=100, high_watermark=10)
+
+    def test_new_fills_pool(self):
+        gen = self.makeOne()
+        hashid = gen()
+        self.assertRegex(hashid, r'^\w{32}$')
+        self.assertEqual(len(gen._pool), 99)
+
+    def test_new_refills_below_low_watermark(self):
+        gen = self.makeOne()
+        hashids = [gen.new() for _ in range(91)]
+        self.assertEqual(len(gen._pool), 100)
+        self.assertEqual(len(set(hashids)), 91)
+
+    def test_new_with_seed(self):
+        gen = self.makeOne()
+        self.assertEqual(
+            gen.new(1762352222709391612), 'bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3')
+        self.assertEqual(len(gen._pool), 0)
+
+    def test_background_refill(self):
+        gen = self.makeOne(background=True)
+        gen.fill()
+        for _ in range(91):
+            gen.new()
+        for _ in range(100):
+            if len(gen._pool) == 100:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(len(gen._pool), 100)
+
+    def test_close_stops_refill_thread(self):
+        gen = self.makeOne(background=True)
+        for _ in range(91):
+            gen.new()
+        thread = gen._thread
+        gen.close()
+        self.assertFalse(thread.is_alive())
+        for _ in range(100):
+            gen.new()
+        self.assertIs(gen._thread, thread)
+
+    def test_collected_generator_stops_refill_thread(self):
+        gen = self.makeOne(background=True)
+        for _ in range(91):
+            gen.new()
+        thread = gen._thread
+        del gen
+        gc.collect()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+
+    def test_threads(self):
+        gen = self.makeOne(background=True)
+        results = []
+
+        def worker():
+            results.extend(gen.new() for _ in range(500))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(results)), 2000)
+
+    def test_fork_discards_pool(self):
+        gen = self.makeOne()
+        gen.fill()
+        parent = set(gen._pool)
+        object.__setattr__(gen, '_pid', -1)
+        self.assertNotIn(gen.new(), parent)
+        self.assertTrue(parent.isdisjoint(gen._pool))
+
+
 class TestHashID(unittest.TestCase):
     def makeOne(self, id=None):
         if id:
@@ -110,6 +263,43 @@ class TestHashID(unittest.TestCase):
         hashid = HashID(gen.encode(seed))
         self.assertEqual(int(hashid), seed)
 
+    def test_hashid_int_cast_cached(self):
+        hashid = self.makeOne()
+        gen = component.queryUtility(IHashIDGenerator)
+        value = int(hashid)
+        self.assertEqual(hashid._decoded, (gen, value))
+
+        with mock.patch.object(HashIDGenerator, 'decode') as decode:
+            self.assertEqual(int(hashid), value)
+        decode.assert_not_called()
+
+    def test_hashid_int_cast_generator_changed(self):
+        hashid = self.makeOne()
+        default = component.queryUtility(IHashIDGenerator)
+        int(hashid)
+        registry = component.getGlobalSiteManager()
+        registry.registerUtility(
+            HashIDGenerator(salt='tenant'), IHashIDGenerator)
+        self.addCleanup(registry.registerUtility, default, IHashIDGenerator)
+        with self.assertRaises(IndexError):
+            int(hashid)
+
+    def test_hashid_to_int_generator(self):
+        gen = HashIDGenerator(salt='sdfs')
+        hashid = HashID('bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3')
+        self.assertEqual(hashid.to_int(gen), 1762352222709391612)
+        self.assertEqual(hashid.to_int(gen), 1762352222709391612)
+        self.assertIs(hashid._decoded[0], gen)
+        with self.assertRaises(IndexError):
+            int(hashid)
+
+    def test_hashid_pickle(self):
+        hashid = self.makeOne()
+        int(hashid)
+        restored = pickle.loads(pickle.dumps(hashid))
+        self.assertEqual(restored, hashid)
+        self.assertNotIn('_decoded', restored.__dict__)
+
     def test_hashid_dictionary_key(self):
         id1 = self.makeOne()
         id2 = self.makeOne()
@@ -128,15 +318,149 @@ class TestHashID(unittest.TestCase):
             hashid.id = 'new'
 
 
+class TestLazyHashID(TestHashID):
+    def makeOne(self, id=None):
+        if id:
+            return LazyHashID(id)
+        else:
+            return LazyHashID()
+
+    def test_not_generated_until_used(self):
+        hashid = self.makeOne()
+        with mock.patch('hashidtools.fields.get_generator') as query:
+            LazyHashID()
+        query.assert_not_called()
+        self.assertFalse(hashid.generated)
+        value = hashid.id
+        self.assertTrue(hashid.generated)
+        self.assertEqual(hashid.id, value)
+        self.assertEqual(str(hashid), value)
+
+    def test_provided_not_generated(self):
+        hashid = self.makeOne('5MopkXVL7Ej9dWkaR9kBqNGYway3RAbd')
+        self.assertTrue(hashid.generated)
+        with self.assertRaises(TypeError):
+            LazyHashID(1)
+
+    def test_threads_generate_once(self):
+        hashid = self.makeOne()
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(hashid.id))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(seen)), 1)
+
+
+class TestCompactHashID(unittest.TestCase):
+    hashid = 'bNo4jLpM8mK2PW6l4260YGXnyQlBE1k3'
+    value = 1762352222709391612
+
+    def makeOne(self, value=None):
+        gen = HashIDGenerator(salt='sdfs')
+        if value is None:
+            value = self.value
+        return CompactHashID(value, gen)
+
+    def test_interface(self):
+        hashid = self.makeOne()
+        self.assertTrue(IHashID.providedBy(hashid))
+        self.assertFalse(hasattr(hashid, '__dict__'))
+
+    def test_from_hashid(self):
+        gen = HashIDGenerator(salt='sdfs')
+        hashid = CompactHashID.from_hashid(self.hashid, gen)
+        self.assertEqual(hashid.value, self.value)
+        self.assertIs(hashid.generator, gen)
+
+    def test_hashid_reprs(self):
+        hashid = self.makeOne()
+        self.assertEqual(str(hashid), self.hashid)
+        self.assertEqual(hashid.id, self.hashid)
+        self.assertEqual(repr(hashid), repr(self.hashid))
+        self.assertEqual(int(hashid), self.value)
+        self.assertEqual(len(hashid), 32)
+
+    def test_hashid_string_compatible(self):
+        hashid = self.makeOne()
+        self.assertEqual(hashid, self.hashid)
+        self.assertEqual(hashid, HashID(self.hashid))
+        self.assertEqual(HashID(self.hashid), hashid)
+        self.assertEqual(hash(hashid), hash(self.hashid))
+        self.assertEqual({hashid: 'value'}[self.hashid], 'value')
+        self.assertNotEqual(hashid, self.makeOne(1))
+
+    def test_hashid_ordering(self):
+        ids = [self.makeOne(value) for value in (3, 1, 2, self.value)]
+        self.assertEqual(
+            [str(hid) for hid in sorted(ids)], sorted(map(str, ids)))
+        mixed = [ids[0], str(ids[1]), HashID(str(ids[2])), ids[3]]
+        self.assertEqual(
+            [str(hid) for hid in sorted(mixed)], sorted(map(str, ids)))
+
+    def test_hashid_eq_same_generator(self):
+        hashid = self.makeOne()
+        with mock.patch.object(HashIDGenerator, 'encode') as encode:
+            self.assertEqual(hashid, self.makeOne())
+            self.assertNotEqual(hashid, self.makeOne(1))
+            self.assertEqual(CompactHashID(1), CompactHashID(1))
+        encode.assert_not_called()
+
+    def test_hashid_eq_consistent_with_hash(self):
+        hashid = self.makeOne()
+        other = CompactHashID(self.value, HashIDGenerator())
+        self.assertNotEqual(hashid, other)
+        self.assertEqual(len({hashid, other}), 2)
+        same = self.makeOne()
+        self.assertEqual(hashid, same)
+        self.assertEqual(hash(hashid), hash(same))
+
+    def test_immutable_attributes(self):
+        from attr.exceptions import FrozenInstanceError
+
+        hashid = self.makeOne()
+        with self.assertRaises(FrozenInstanceError):
+            hashid.value = 1
+
+    def test_hashid_pickle(self):
+        hashid = self.makeOne()
+        restored = pickle.loads(pickle.dumps(hashid))
+        self.assertEqual(restored.value, hashid.value)
+        self.assertEqual(restored.generator, hashid.generator)
+        self.assertEqual(str(restored), self.hashid)
+        self.assertEqual(restored, hashid)
+
+    def test_hashid_pickle_default_generator(self):
+        hashid = CompactHashID(self.value)
+        restored = pickle.loads(pickle.dumps(hashid))
+        self.assertIsNone(restored.generator)
+        self.assertEqual(str(restored), str(hashid))
+
+
 @attr.s
 class Fixture:
     id: str = fields.hashid(init=False)
     name: str = attr.ib(default='default-name')
 
 
+class Item(persistent.Persistent):
+    def __init__(self, name):
+        self.id = HashIDGenerator().new()
+        self.name = name
+
+
+@attr.s
+class LazyFixture:
+    _id = fields.lazy_hashid()
+    id = fields.LazyHashIDAttribute()
+    name: str = attr.ib(default='default-name')
+
+
 class TestHashIDManager(unittest.TestCase):
-    def makeOne(self):
-        return HashIDManager()
+    def makeOne(self, **kwargs):
+        return HashIDManager(**kwargs)
 
     def test_interface(self):
         intid = self.makeOne()
@@ -171,3 +495,439 @@ class TestHashIDManager(unittest.TestCase):
 
         intid.unregister(inst)
         self.assertEqual(len(removed), 1)
+
+    def test_register_generates_lazy_id(self):
+        intid = self.makeOne()
+        inst = LazyFixture(name='test')
+        self.assertIs(inst._id, fields.LAZY)
+
+        uid = intid.register(inst)
+        self.assertEqual(uid, inst.id)
+        self.assertIs(intid.getObject(uid), inst)
+
+        intid.unregister(inst)
+        self.assertIsNone(inst.id)
+
+    def test_int_keys(self):
+        intid = self.makeOne(int_keys=True)
+        self.assertIsInstance(intid.refs, intid.family.IO.BTree)
+
+        inst = Fixture('test')
+        uid = intid.register(inst)
+        self.assertEqual(list(intid.refs.keys()), [int(HashID(uid))])
+        self.assertIs(intid.getObject(uid), inst)
+        self.assertIs(intid.queryObject(uid), inst)
+        self.assertEqual(list(intid), [uid])
+        self.assertEqual(intid.items(), [(uid, inst)])
+
+        self.assertIsNone(intid.queryObject('invalid'))
+        with self.assertRaises(ObjectMissingError):
+            intid.getObject('invalid')
+
+        intid.unregister(inst)
+        self.assertEqual(len(intid), 0)
+
+    def test_migrate(self):
+        intid = self.makeOne()
+        insts = [Fixture('test') for _ in range(10)]
+        uids = [intid.register(inst) for inst in insts]
+
+        intid.migrate(int_keys=True)
+        self.assertTrue(intid.int_keys)
+        self.assertIsInstance(intid.refs, intid.family.IO.BTree)
+        for uid, inst in zip(uids, insts):
+            self.assertIs(intid.getObject(uid), inst)
+
+        intid.migrate(int_keys=False)
+        self.assertFalse(intid.int_keys)
+        self.assertEqual(sorted(intid.refs.keys()), sorted(uids))
+
+    def test_replace_refs(self):
+        intid = self.makeOne(collision_filter=True, id_cache=10)
+        inst = Fixture('test')
+        intid.register(inst)
+        self.assertIsNotNone(intid._v_filter)
+        self.assertIsNotNone(intid._v_ids)
+
+        refs = intid.new_refs()
+        self.assertIs(type(refs), type(intid.refs))
+        intid.replace_refs(refs)
+        self.assertIs(intid.refs, refs)
+        self.assertIsNone(intid._v_filter)
+        self.assertIsNone(intid._v_filter_state)
+        self.assertIsNone(intid._v_ids)
+
+    def test_int_keys_pin_generator(self):
+        intid = self.makeOne()
+        insts = [Fixture('test') for _ in range(5)]
+        uids = intid.register_many(insts)
+        intid.migrate(int_keys=True)
+        default = intid.key_generator
+
+        registry = component.getGlobalSiteManager()
+        tenant = HashIDGenerator(salt='tenant')
+        registry.registerUtility(tenant, IHashIDGenerator)
+        self.addCleanup(registry.registerUtility, default, IHashIDGenerator)
+
+        self.assertEqual(intid.key_generator, default)
+        for uid, inst in zip(uids, insts):
+            self.assertIs(intid.queryObject(uid), inst)
+        self.assertEqual(sorted(intid), sorted(uids))
+        self.assertEqual(sorted(intid.iter_ids()), sorted(uids))
+
+        restored = pickle.loads(pickle.dumps(intid))
+        self.assertEqual(restored.key_generator, default)
+
+        dupe = Fixture('test')
+        dupe.id = tenant.new()
+        with self.assertRaises(IDRegisterError):
+            intid.register(dupe)
+
+        intid.migrate(int_keys=False)
+        self.assertEqual(sorted(intid.refs.keys()), sorted(uids))
+        self.assertIs(intid.key_generator, tenant)
+
+    def test_register_many(self):
+        intid = self.makeOne()
+        insts = [Fixture('test') for _ in range(10)]
+
+        added = []
+        handler = added.append
+        zope.event.subscribers.append(handler)
+        try:
+            uids = intid.register_many(insts)
+        finally:
+            zope.event.subscribers.remove(handler)
+
+        self.assertEqual(uids, [inst.id for inst in insts])
+        self.assertEqual(len(intid), 10)
+        self.assertEqual([type(event) for event in added], [AddedEvent] * 10)
+        self.assertEqual([event.id for event in added], uids)
+        for uid, inst in zip(uids, insts):
+            self.assertIs(intid.getObject(uid), inst)
+
+    def test_register_many_batch_event(self):
+        intid = self.makeOne(int_keys=True)
+        insts = [Fixture('test') for _ in range(10)]
+
+        added = []
+        handler = added.append
+        zope.event.subscribers.append(handler)
+        try:
+            uids = intid.register_many(insts, batch_event=True)
+        finally:
+            zope.event.subscribers.remove(handler)
+
+        self.assertEqual(len(added), 1)
+        self.assertIsInstance(added[0], IdsAddedEvent)
+        self.assertEqual(added[0].ids, uids)
+        self.assertEqual(added[0].objects, insts)
+        self.assertIs(added[0].idmanager, intid)
+
+    def test_register_many_validates_batch(self):
+        intid = self.makeOne()
+        inst = Fixture('test')
+        dupe = Fixture('dupe')
+        dupe.id = inst.id
+        with self.assertRaises(IntIdInUseError):
+            intid.register_many([Fixture('test'), inst, dupe])
+        self.assertEqual(len(intid), 0)
+
+    def test_unregister_many(self):
+        intid = self.makeOne()
+        insts = [Fixture('test') for _ in range(10)]
+        uids = intid.register_many(insts)
+
+        removed = []
+        handler = removed.append
+        zope.event.subscribers.append(handler)
+        try:
+            intid.unregister_many(insts[:5], batch_event=True)
+            intid.unregister_many(insts[5:])
+        finally:
+            zope.event.subscribers.remove(handler)
+
+        self.assertEqual(len(intid), 0)
+        self.assertIsInstance(removed[0], IdsRemovedEvent)
+        self.assertEqual(removed[0].ids, uids[:5])
+        self.assertEqual([event.id for event in removed[1:]], uids[5:])
+        self.assertTrue(all(inst.id is None for inst in insts))
+
+    def test_collision_filter(self):
+        intid = self.makeOne(collision_filter=True)
+        insts = [Fixture('test') for _ in range(10)]
+        uids = intid.register_many(insts)
+        intid.register(Fixture('test'))
+
+        bloom = intid._v_filter
+        self.assertEqual(len(bloom), 11)
+        self.assertTrue(all(uid in bloom for uid in uids))
+
+        dupe = Fixture('dupe')
+        dupe.id = uids[0]
+        with self.assertRaises(IntIdInUseError):
+            intid.register(dupe)
+        intid.register(insts[0])
+        self.assertIs(intid.getObject(uids[0]), insts[0])
+
+    def test_collision_filter_after_migrate(self):
+        intid = self.makeOne(collision_filter=True)
+        inst = Fixture('test')
+        intid.register(inst)
+        intid.migrate(int_keys=True)
+
+        dupe = Fixture('dupe')
+        dupe.id = inst.id
+        with self.assertRaises(IntIdInUseError):
+            intid.register(dupe)
+        self.assertIs(intid.getObject(inst.id), inst)
+
+    @unittest.skipIf(ZODB is None, 'requires ZODB')
+    def test_collision_filter_other_connection(self):
+        db = ZODB.DB(None)
+        self.addCleanup(db.close)
+        first = transaction.TransactionManager()
+        second = transaction.TransactionManager()
+        conn1 = db.open(first)
+        conn1.root.intid = self.makeOne(collision_filter=True)
+        conn1.root.intid.register(Item('first'))
+        first.commit()
+
+        conn2 = db.open(second)
+        item = Item('second')
+        conn2.root.intid.register(item)
+        conn2.root.item = item
+        second.commit()
+
+        first.begin()
+        dupe = Item('dupe')
+        dupe.id = item.id
+        with self.assertRaises(IntIdInUseError):
+            conn1.root.intid.register(dupe)
+        self.assertEqual(conn1.root.intid.getObject(item.id).name, 'second')
+
+    @unittest.skipIf(ZODB is None, 'requires ZODB')
+    def test_collision_filter_other_connection_no_rebuild(self):
+        db = ZODB.DB(None)
+        self.addCleanup(db.close)
+        first = transaction.TransactionManager()
+        second = transaction.TransactionManager()
+        conn1 = db.open(first)
+        conn1.root.intid = self.makeOne(collision_filter=True)
+        conn1.root.intid.register_many([Item('first') for _ in range(10)])
+        first.commit()
+        conn2 = db.open(second)
+
+        with mock.patch.object(
+                BloomFilter, 'update', autospec=True,
+                side_effect=BloomFilter.update) as update:
+            for _ in range(10):
+                second.begin()
+                conn2.root.intid.register(Item('second'))
+                second.commit()
+                first.begin()
+                conn1.root.intid.register(Item('first'))
+                first.commit()
+        # Only the second connection's initial build, out of date filters
+        # fall back to direct checks.
+        self.assertEqual(update.call_count, 1)
+
+    def test_collision_filter_retries(self):
+        intid = self.makeOne(collision_filter=True, max_retries=2)
+        inst = Fixture('test')
+        intid.register(inst)
+
+        gen = HashIDGenerator()
+        fresh = gen.new()
+        ids = iter([inst.id, inst.id, fresh])
+        with mock.patch('hashidtools.types.get_generator') as query:
+            query.return_value = lambda: next(ids)
+            self.assertEqual(intid.generateId(), fresh)
+
+            query.return_value = lambda: inst.id
+            with self.assertRaises(IntIdInUseError):
+                intid.generateId()
+
+    def test_get_id_missing(self):
+        intid = self.makeOne()
+        inst = Fixture('test')
+        inst.id = None
+        with self.assertRaises(IntIdMissingError):
+            intid.getId(inst)
+        self.assertIsNone(intid.queryId(inst))
+        intid.unregister(inst)
+
+    def test_id_cache(self):
+        intid = self.makeOne(id_cache=2)
+        insts = [Fixture('test') for _ in range(3)]
+        uids = intid.register_many(insts[:2])
+        self.assertEqual(len(intid._v_ids), 2)
+
+        with mock.patch('hashidtools.types.weakref') as ref:
+            self.assertEqual([intid.getId(inst) for inst in insts[:2]], uids)
+        ref.assert_not_called()
+
+        uid = intid.register(insts[2])
+        self.assertEqual(len(intid._v_ids), 2)
+        self.assertNotIn(id(insts[0]), intid._v_ids)
+        self.assertEqual(intid.getId(insts[2]), uid)
+
+        intid.unregister(insts[2])
+        self.assertNotIn(id(insts[2]), intid._v_ids)
+        self.assertIsNone(intid.queryId(insts[2]))
+
+        # Not registered, only referenced here.
+        inst = Fixture('test')
+        self.assertEqual(intid.getId(inst), inst.id)
+        key = id(inst)
+        self.assertIn(key, intid._v_ids)
+        del inst
+        self.assertNotIn(key, intid._v_ids)
+
+    def test_id_cache_proxied(self):
+        from zope.security.checker import ProxyFactory, NamesChecker
+
+        intid = self.makeOne(id_cache=10)
+        inst = Fixture('test')
+        uid = intid.register(inst)
+        proxied = ProxyFactory(inst, NamesChecker(['id']))
+        with mock.patch('hashidtools.types.weakref') as ref:
+            self.assertEqual(intid.getId(proxied), uid)
+            self.assertEqual(intid.getId(ProxyFactory(inst)), uid)
+        ref.assert_not_called()
+
+    def test_id_cache_disabled(self):
+        intid = self.makeOne()
+        inst = Fixture('test')
+        intid.register(inst)
+        intid.getId(inst)
+        self.assertIsNone(intid._v_ids)
+
+    def test_iter_ids(self):
+        intid = self.makeOne()
+        uids = sorted(intid.register_many([Fixture('test') for _ in range(25)]))
+        self.assertEqual(list(intid.iter_ids(batch=4)), uids)
+        self.assertEqual(list(intid.iter_ids(min=uids[5], max=uids[9],
+                                             batch=2)), uids[5:10])
+        self.assertEqual(list(intid.iter_ids(after=uids[20])), uids[21:])
+        self.assertEqual(list(intid.iter_ids(after=uids[-1])), [])
+        with self.assertRaises(ValueError):
+            list(intid.iter_ids(batch=0))
+
+    def test_iter_ids_int_keys(self):
+        intid = self.makeOne(int_keys=True)
+        gen = HashIDGenerator()
+        uids = intid.register_many([Fixture('test') for _ in range(25)])
+        uids.sort(key=gen.decode)
+        self.assertEqual(list(intid.iter_ids(batch=4)), uids)
+        self.assertEqual(list(intid.iter_ids(min=uids[5], max=uids[9])),
+                         uids[5:10])
+
+    def test_iter_objects_resume(self):
+        intid = self.makeOne()
+        insts = [Fixture('test') for _ in range(10)]
+        intid.register_many(insts)
+
+        first = []
+        for uid, obj in intid.iter_objects(batch=3):
+            first.append((uid, obj))
+            if len(first) == 4:
+                break
+        cursor = first[-1][0]
+        rest = list(intid.iter_objects(after=cursor, batch=3))
+        self.assertEqual(first + rest, sorted(
+            ((inst.id, inst) for inst in insts), key=lambda pair: pair[0]))
+
+    @unittest.skipIf(ZODB is None, 'requires ZODB')
+    def test_iter_objects_deactivate(self):
+        db = ZODB.DB(None)
+        self.addCleanup(db.close)
+        conn = db.open()
+        intid = conn.root.intid = self.makeOne()
+        intid.register_many([Item('test') for _ in range(10)])
+        transaction.commit()
+
+        seen = []
+        for uid, obj in intid.iter_objects(batch=4, deactivate=True):
+            self.assertEqual(obj.name, 'test')
+            seen.append(obj)
+        self.assertEqual(len(seen), 10)
+        self.assertTrue(all(obj._p_changed is None for obj in seen))
+
+    def test_setstate_defaults(self):
+        intid = self.makeOne()
+        state = intid.__getstate__()
+        del state['collision_filter']
+        del state['max_retries']
+        del state['id_cache']
+        restored = HashIDManager.__new__(HashIDManager)
+        restored.__setstate__(state)
+        self.assertFalse(restored.collision_filter)
+        self.assertEqual(restored.max_retries, 10)
+        self.assertEqual(restored.id_cache, 0)
+
+
+class TestShardedHashIDManager(TestHashIDManager):
+    def makeOne(self, **kwargs):
+        kwargs.setdefault('shards', 4)
+        return ShardedHashIDManager(**kwargs)
+
+    def assertShards(self, intid, tree):
+        self.assertIsInstance(intid.refs, ShardedBTree)
+        self.assertEqual(len(intid.refs.shards), intid.shards)
+        for shard in intid.refs.shards:
+            self.assertIsInstance(shard, tree)
+
+    def test_int_keys(self):
+        intid = self.makeOne(int_keys=True)
+        self.assertShards(intid, intid.family.IO.BTree)
+
+        insts = [Fixture('test') for _ in range(20)]
+        uids = intid.register_many(insts)
+        keys = sorted(int(HashID(uid)) for uid in uids)
+        self.assertEqual(list(intid.refs.keys()), keys)
+        self.assertEqual(list(intid), [HashIDGenerator().encode(key)
+                                       for key in keys])
+        for uid, inst in zip(uids, insts):
+            self.assertIs(intid.getObject(uid), inst)
+
+        self.assertIsNone(intid.queryObject('invalid'))
+        with self.assertRaises(ObjectMissingError):
+            intid.getObject('invalid')
+
+        intid.unregister_many(insts)
+        self.assertEqual(len(intid), 0)
+
+    def test_migrate(self):
+        intid = self.makeOne()
+        insts = [Fixture('test') for _ in range(10)]
+        uids = [intid.register(inst) for inst in insts]
+
+        intid.migrate(int_keys=True)
+        self.assertShards(intid, intid.family.IO.BTree)
+        for uid, inst in zip(uids, insts):
+            self.assertIs(intid.getObject(uid), inst)
+
+        intid.migrate(int_keys=False)
+        self.assertShards(intid, intid.family.OO.BTree)
+        self.assertEqual(list(intid), sorted(uids))
+
+    def test_partitioned(self):
+        intid = self.makeOne()
+        uids = intid.register_many([Fixture('test') for _ in range(100)])
+        self.assertEqual(len(intid), 100)
+        self.assertEqual(list(intid), sorted(uids))
+        for uid in uids:
+            self.assertIn(uid, intid.refs.shard(uid))
+        self.assertTrue(all(len(shard) for shard in intid.refs.shards))
+
+    def test_invalid_shards(self):
+        with self.assertRaises(ValueError):
+            self.makeOne(shards=0)
+
+    def test_pickle(self):
+        intid = self.makeOne(int_keys=True)
+        uid = intid.register(Fixture('test'))
+        restored = pickle.loads(pickle.dumps(intid))
+        self.assertEqual(restored.shards, 4)
+        self.assertEqual(restored.getObject(uid).name, 'test')